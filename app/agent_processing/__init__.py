@@ -1,7 +1,37 @@
-from typing import Optional, Dict, Any, List
+from typing import AsyncIterator, Optional, Dict, Any, List, Tuple
+import asyncio
 from .registry import get_handler
-from .base import AgentContext
-from app.services.generic import ingestion_db
+from .base import AgentContext, AgentResult
+from app.services.generic import ingestion_db, session_store
+
+
+def _context(
+    input_text: str,
+    agent: Optional[str],
+    extra_tools: Optional[list[str]],
+    session_id: Optional[str],
+    filename: Optional[str],
+) -> AgentContext:
+    return AgentContext(
+        input_text=input_text,
+        agent_name=(agent or "dochelp").lower(),
+        filename=filename,
+        extra_tools=extra_tools,
+        session_id=session_id,
+    )
+
+
+def _remember(ctx: AgentContext, result: AgentResult) -> None:
+    # Every route (agent or direct dispatch) records the turn for follow-ups
+    session_store.append_turn(ctx.agent_name, ctx.session_id, user=ctx.input_text, assistant=result.response)
+
+
+def _response(result: AgentResult) -> Dict[str, Any]:
+    return {
+        "response": result.response,
+        "session_id": result.session_id,
+        "files": result.files or [],
+    }
 
 
 def handle_agent_query(
@@ -16,26 +46,43 @@ def handle_agent_query(
     Entry point for processing an agent query. Selects the agent, builds context,
     delegates to the appropriate handler, and returns a response dict.
     """
-    agent_name = (agent or "dochelp").lower()
+    ctx = _context(input_text, agent, extra_tools, session_id, filename)
+    result = get_handler(ctx.agent_name).handle(ctx)
+    _remember(ctx, result)
+    return _response(result)
 
-    ctx = AgentContext(
-        input_text=input_text,
-        agent_name=agent_name,
-        filename=filename,
-        extra_tools=extra_tools,
-        session_id=session_id,
-    )
 
-    handler = get_handler(agent_name)
-    result = handler.handle(ctx)
+async def handle_agent_query_async(
+    *,
+    input_text: str,
+    agent: Optional[str] = None,
+    extra_tools: Optional[list[str]] = None,
+    session_id: Optional[str] = None,
+    filename: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Async variant of ``handle_agent_query`` for async endpoints."""
+    ctx = _context(input_text, agent, extra_tools, session_id, filename)
+    result = await get_handler(ctx.agent_name).handle_async(ctx)
+    await asyncio.to_thread(_remember, ctx, result)
+    return _response(result)
 
-    files = result.files or []
 
-    return {
-        "response": result.response,
-        "session_id": result.session_id,
-        "files": files,
-    }
+async def stream_agent_query(
+    *,
+    input_text: str,
+    agent: Optional[str] = None,
+    extra_tools: Optional[list[str]] = None,
+    session_id: Optional[str] = None,
+    filename: Optional[str] = None,
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Streaming variant: yields handler events, ending with ``("done", response dict)``."""
+    ctx = _context(input_text, agent, extra_tools, session_id, filename)
+    async for event, data in get_handler(ctx.agent_name).handle_stream(ctx):
+        if event == "result":
+            await asyncio.to_thread(_remember, ctx, data)
+            yield "done", _response(data)
+        else:
+            yield event, data
 
 
 def handle_agent_files(*, agent: Optional[str]) -> Dict[str, Any]:
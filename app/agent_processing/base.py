@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional, Protocol, Any, List
+from typing import Optional, Protocol, Any, AsyncIterator, List, Tuple
 
 
 @dataclass
@@ -23,3 +23,9 @@ class AgentResult:
 class AgentHandler(Protocol):
     def handle(self, ctx: AgentContext) -> AgentResult:  # pragma: no cover - interface
         ...
+
+    async def handle_async(self, ctx: AgentContext) -> AgentResult:  # pragma: no cover - interface
+        ...
+
+    def handle_stream(self, ctx: AgentContext) -> AsyncIterator[Tuple[str, Any]]:  # pragma: no cover - interface
+        ...
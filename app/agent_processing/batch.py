@@ -0,0 +1,60 @@
+from typing import Any, Dict, List, Optional
+import asyncio
+
+from app.services.generic import chat_service, ingestion_db, insight_services
+from app.utils.Logging.logger import logger
+from .handlers.doc_help import _CHAT_KWARGS
+from .handlers.recruiter import _PROFILE_CHAT_KWARGS
+
+
+# Retrieval settings per agent: the same as its single-question chat tool
+_BATCH_KWARGS: Dict[str, Dict[str, Any]] = {
+    "dochelp": _CHAT_KWARGS,
+    "recruiter": _PROFILE_CHAT_KWARGS,
+}
+
+
+def _known_files(agent: str) -> List[str]:
+    rows = ingestion_db.list_documents(agent)
+    return [r["file"] for r in rows if isinstance(r, dict) and isinstance(r.get("file"), str)]
+
+
+async def handle_agent_batch_async(
+    *,
+    agent: str,
+    filename: str,
+    questions: List[str],
+    k: Optional[int] = None,
+    score_threshold: Optional[float] = None,
+    strict: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """Answer a list of questions over one file, grounded like ``chat_over_file``.
+
+    Bypasses the agent loop: every question follows the deterministic
+    retrieve-then-answer route, batched in ``chat_service.answer_batch``.
+    Output: {"file": str, "results": [{"index", "question", "response"[, "error"]}]}
+    in question order. Raises LookupError for unknown files.
+    """
+    name = (agent or "dochelp").lower()
+    known = await asyncio.to_thread(_known_files, name)
+    if filename not in known:
+        raise LookupError(f"File '{filename}' is not registered for agent '{name}'")
+
+    kwargs = dict(_BATCH_KWARGS.get(name, _CHAT_KWARGS))
+    if k is not None:
+        kwargs["k"] = k
+    if score_threshold is not None:
+        kwargs["score_threshold"] = score_threshold
+    if strict is not None:
+        kwargs["strict"] = strict
+
+    # Same idempotent index step as initialize_insights; a no-op once the file is indexed
+    await asyncio.to_thread(insight_services.create_vector_store, filename)
+    answers = await chat_service.answer_batch(filename, questions, **kwargs)
+    logger.info("Agent batch answered | agent=%s | file=%s | questions=%d", name, filename, len(questions))
+    return {
+        "file": filename,
+        "results": [
+            {"index": i, "question": q, **a} for i, (q, a) in enumerate(zip(questions, answers))
+        ],
+    }
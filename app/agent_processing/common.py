@@ -1,6 +1,32 @@
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 
-from app.agents.agent_factory import build_agent
+from app.agents.agent_config import AGENTS
+from app.agents.agent_factory import AGENT_LLM_TAG, get_agent, prompt_inputs
+from app.services.generic import session_store
+from app.tools.streaming import TOKEN_EVENT
+
+
+def _payload(agent_name: str, input_text: str, session_id: Optional[str], prompt_vars: Optional[dict]) -> dict:
+    # Prompt variables are template inputs of the cached executor, not baked into its prompt
+    payload = {
+        **prompt_inputs(agent_name, prompt_vars),
+        "input": input_text,
+        # Recent turns plus a rolling summary of older ones, within SESSION_TOKEN_BUDGET
+        "chat_history": session_store.history_messages(agent_name, session_id),
+    }
+    if session_id:
+        payload["session_id"] = session_id
+    return payload
+
+
+def direct_dispatch_enabled(agent_name: str, extra_tools: Optional[list[str]] = None) -> bool:
+    """Whether handlers may call services directly for deterministic routes.
+
+    Controlled per agent by ``direct_dispatch`` in AGENTS; requests that add extra
+    tools always go through the agent, since the route is no longer fixed.
+    """
+    cfg = AGENTS.get(agent_name) or {}
+    return bool(cfg.get("direct_dispatch")) and not extra_tools
 
 
 def run_agent(
@@ -11,14 +37,62 @@ def run_agent(
     session_id: Optional[str] = None,
     prompt_vars: Optional[dict] = None,
 ):
-    executor = build_agent(agent_name, extra_tools=extra_tools, prompt_vars=prompt_vars)
+    executor = get_agent(agent_name, extra_tools=extra_tools)
+    result = executor.invoke(_payload(agent_name, input_text, session_id, prompt_vars))
+    return result.get("output", result)
 
-    payload = {
-        "input": input_text,
-        "chat_history": [],
-    }
-    if session_id:
-        payload["session_id"] = session_id
 
-    result = executor.invoke(payload)
+async def run_agent_async(
+    *,
+    agent_name: str,
+    input_text: str,
+    extra_tools: Optional[list[str]] = None,
+    session_id: Optional[str] = None,
+    prompt_vars: Optional[dict] = None,
+):
+    """Async variant of ``run_agent``: LLM calls and async tools are awaited, not run on threads."""
+    executor = get_agent(agent_name, extra_tools=extra_tools)
+    result = await executor.ainvoke(_payload(agent_name, input_text, session_id, prompt_vars))
     return result.get("output", result)
+
+
+def _tool_output_text(output: Any) -> str:
+    # Tool end events carry a ToolMessage in recent LangChain versions, a plain string before
+    content = getattr(output, "content", output)
+    return content if isinstance(content, str) else str(content)
+
+
+async def stream_agent(
+    *,
+    agent_name: str,
+    input_text: str,
+    extra_tools: Optional[list[str]] = None,
+    session_id: Optional[str] = None,
+    prompt_vars: Optional[dict] = None,
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Run the agent and yield ``(event, data)`` pairs from ``astream_events``.
+
+    Events: ``tool_start``, ``tool_end``, ``tool_token`` (answer tokens streamed
+    from inside a tool), ``token`` (final-answer tokens from the agent LLM) and
+    finally ``output`` with the executor's output.
+    """
+    executor = get_agent(agent_name, extra_tools=extra_tools)
+    payload = _payload(agent_name, input_text, session_id, prompt_vars)
+    async for event in executor.astream_events(payload, version="v2"):
+        kind = event["event"]
+        data = event.get("data") or {}
+        if kind == "on_tool_start":
+            yield "tool_start", {"tool": event["name"], "input": data.get("input")}
+        elif kind == "on_tool_end":
+            yield "tool_end", {"tool": event["name"], "output": _tool_output_text(data.get("output"))}
+        elif kind == "on_custom_event" and event["name"] == TOKEN_EVENT:
+            yield "tool_token", data
+        elif kind == "on_chat_model_stream" and AGENT_LLM_TAG in (event.get("tags") or []):
+            # Untagged chat models are LLM calls inside tools (e.g. translation), not the answer
+            content = getattr(data.get("chunk"), "content", None)
+            # Tool-call chunks have empty content; only forward answer text
+            if isinstance(content, str) and content:
+                yield "token", {"token": content}
+        elif kind == "on_chain_end" and not event.get("parent_ids"):
+            output = data.get("output")
+            yield "output", {"output": output.get("output", output) if isinstance(output, dict) else output}
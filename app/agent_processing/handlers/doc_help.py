@@ -1,8 +1,14 @@
-from typing import List
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from ..base import AgentHandler, AgentContext, AgentResult
-from ..common import run_agent
+from ..common import direct_dispatch_enabled, run_agent, run_agent_async, stream_agent
+import asyncio
 import os
-from app.services.generic import ingestion_db
+from app.services.generic import chat_service, ingestion_db, insight_services, session_store
+from app.utils.Logging.logger import logger
+
+
+# Same retrieval settings as the chat_over_file tool
+_CHAT_KWARGS: Dict[str, Any] = {"k": 24, "score_threshold": 0.0, "strict": False}
 
 
 def _get_known_files() -> List[str]:
@@ -17,7 +23,8 @@ def _get_known_files() -> List[str]:
 
 
 class DocHelpHandler(AgentHandler):
-    def handle(self, ctx: AgentContext) -> AgentResult:
+    def _plan(self, ctx: AgentContext) -> Tuple[Optional[AgentResult], Dict[str, Any]]:
+        """Pick the active file; returns (early result, run_agent kwargs)."""
         known_files = _get_known_files()
         # Minimal guard: avoid LLM call when no files available
         if not known_files:
@@ -25,7 +32,7 @@ class DocHelpHandler(AgentHandler):
                 "This assistant answers questions grounded in uploaded files. "
                 "Please upload a file and ask your question about it."
             )
-            return AgentResult(response=msg, session_id=ctx.session_id, files=[])
+            return AgentResult(response=msg, session_id=ctx.session_id, files=[]), {}
 
         active_file = None
 
@@ -39,7 +46,7 @@ class DocHelpHandler(AgentHandler):
                     f"File not found: {override}. Please provide an exact filename."
                     + (f" Options: {options}" if options else "")
                 )
-                return AgentResult(response=msg, session_id=ctx.session_id, files=[])
+                return AgentResult(response=msg, session_id=ctx.session_id, files=[]), {}
 
         if not active_file:
             lowered = (ctx.input_text or "").lower()
@@ -48,6 +55,12 @@ class DocHelpHandler(AgentHandler):
                     active_file = f
                     break
 
+        # Follow-ups stay on the file this session already selected
+        if not active_file:
+            remembered = session_store.get_doc_file(ctx.agent_name, ctx.session_id)
+            if remembered in known_files:
+                active_file = remembered
+
         # Require explicit file selection before running the agent
         if not active_file:
             if len(known_files) == 1:
@@ -59,15 +72,88 @@ class DocHelpHandler(AgentHandler):
                     + (f"Options: {options}" if options else "No files found in storage.")
                 )
 
-                return AgentResult(response=msg, session_id=ctx.session_id, files=[])
+                return AgentResult(response=msg, session_id=ctx.session_id, files=[]), {}
+
+        session_store.set_doc_file(ctx.agent_name, ctx.session_id, active_file)
+        return None, {
+            "agent_name": ctx.agent_name,
+            "input_text": ctx.input_text,
+            "extra_tools": ctx.extra_tools,
+            "session_id": ctx.session_id,
+            "prompt_vars": {"doc_file": active_file} if active_file else None,
+        }
+
+    def _direct_file(self, ctx: AgentContext, run_kwargs: Dict[str, Any]) -> Optional[str]:
+        """The selected file when the route is deterministic (initialize + chat_over_file)."""
+        if not direct_dispatch_enabled(ctx.agent_name, ctx.extra_tools):
+            return None
+        active_file = (run_kwargs.get("prompt_vars") or {}).get("doc_file")
+        # CSV questions may need describe_csv/query_csv instead; let the agent choose
+        if not active_file or os.path.splitext(active_file)[1].lower() == ".csv":
+            return None
+        return active_file
 
-        output = run_agent(
-            agent_name=ctx.agent_name,
-            input_text=ctx.input_text,
-            extra_tools=ctx.extra_tools,
-            session_id=ctx.session_id,
-            prompt_vars={"doc_file": active_file} if active_file else None,
-        )
+    def _ensure_index(self, active_file: str) -> None:
+        # Same idempotent call the prompt asks the agent to make first (initialize_insights)
+        insight_services.create_vector_store(active_file)
+        logger.info("DocHelp direct dispatch | file=%s", active_file)
 
+    def handle(self, ctx: AgentContext) -> AgentResult:
+        early, run_kwargs = self._plan(ctx)
+        if early is not None:
+            return early
+        active_file = self._direct_file(ctx, run_kwargs)
+        if active_file:
+            self._ensure_index(active_file)
+            history = session_store.history_dicts(ctx.agent_name, ctx.session_id)
+            result = chat_service.answer(active_file, ctx.input_text, history=history, **_CHAT_KWARGS)
+            output = result.get("response")
+        else:
+            output = run_agent(**run_kwargs)
         response_text = output if isinstance(output, str) else str(output)
         return AgentResult(response=response_text, session_id=ctx.session_id, files=[])
+
+    async def handle_async(self, ctx: AgentContext) -> AgentResult:
+        # File selection reads the SQLite registry; keep it off the event loop
+        early, run_kwargs = await asyncio.to_thread(self._plan, ctx)
+        if early is not None:
+            return early
+        active_file = self._direct_file(ctx, run_kwargs)
+        if active_file:
+            await asyncio.to_thread(self._ensure_index, active_file)
+            history = await asyncio.to_thread(session_store.history_dicts, ctx.agent_name, ctx.session_id)
+            result = await chat_service.answer_async(
+                active_file, ctx.input_text, history=history, **_CHAT_KWARGS
+            )
+            output = result.get("response")
+        else:
+            output = await run_agent_async(**run_kwargs)
+        response_text = output if isinstance(output, str) else str(output)
+        return AgentResult(response=response_text, session_id=ctx.session_id, files=[])
+
+    async def handle_stream(self, ctx: AgentContext) -> AsyncIterator[Tuple[str, Any]]:
+        """Yield agent stream events, then ``("result", AgentResult)``."""
+        early, run_kwargs = await asyncio.to_thread(self._plan, ctx)
+        if early is not None:
+            yield "result", early
+            return
+        active_file = self._direct_file(ctx, run_kwargs)
+        output: Any = ""
+        if active_file:
+            await asyncio.to_thread(self._ensure_index, active_file)
+            history = await asyncio.to_thread(session_store.history_dicts, ctx.agent_name, ctx.session_id)
+            parts: List[str] = []
+            async for token in chat_service.answer_stream(
+                active_file, ctx.input_text, history=history, **_CHAT_KWARGS
+            ):
+                parts.append(token)
+                yield "token", {"token": token}
+            output = "".join(parts)
+        else:
+            async for event, data in stream_agent(**run_kwargs):
+                if event == "output":
+                    output = data.get("output")
+                    continue
+                yield event, data
+        response_text = output if isinstance(output, str) else str(output)
+        yield "result", AgentResult(response=response_text, session_id=ctx.session_id, files=[])
@@ -1,24 +1,42 @@
 from __future__ import annotations
 
+import asyncio
 import json
-from typing import List
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from ..base import AgentHandler, AgentContext, AgentResult
-from ..common import run_agent
-from app.services.generic import ingestion_db
+from ..common import direct_dispatch_enabled, run_agent, run_agent_async, stream_agent
+from app.services.generic import chat_service, ingestion_db, session_store
 from app.services.agents import recruiter_service
 from app.utils.Logging.logger import logger
 
 
+# Same retrieval settings as the chat_over_profile tool defaults
+_PROFILE_CHAT_KWARGS: Dict[str, Any] = {"k": 24, "score_threshold": 0.45, "strict": False}
+
+
+def _search_payload(description: str) -> Dict[str, Any]:
+    """The match workflow the prompt prescribes: translate once, then search."""
+    translated_text, translated_flag = recruiter_service.translate_description(description)
+    search = recruiter_service.search_candidates_detailed(translated_text)
+    return {
+        "query": translated_text,
+        "translated": translated_flag,
+        "matches": [match.as_dict() for match in search.matches],
+        **search.diagnostics(),
+    }
+
+
 class RecruiterHandler(AgentHandler):
-    def handle(self, ctx: AgentContext) -> AgentResult:
+    def _plan(self, ctx: AgentContext) -> Tuple[Optional[AgentResult], Dict[str, Any]]:
+        """Validate the request and build run_agent kwargs; returns (early result, kwargs)."""
         description = (ctx.input_text or "").strip()
         if not description:
             return AgentResult(
                 response={"error": "Job description is required."},
                 session_id=ctx.session_id,
                 files=[],
-            )
+            ), {}
 
         try:
             records = ingestion_db.list_documents(ctx.agent_name)
@@ -30,7 +48,7 @@ class RecruiterHandler(AgentHandler):
                 "No candidate documents are available. Upload resumes for the recruiter agent and try again."
             )
             logger.info("Recruiter handler aborting: no documents indexed for agent '%s'", ctx.agent_name)
-            return AgentResult(response={"error": message}, session_id=ctx.session_id, files=[])
+            return AgentResult(response={"error": message}, session_id=ctx.session_id, files=[]), {}
 
         files_for_agent = []
         for record in records:
@@ -58,29 +76,98 @@ class RecruiterHandler(AgentHandler):
                     ctx.agent_name,
                     file_override,
                 )
-                return AgentResult(response={"error": message}, session_id=ctx.session_id, files=[])
+                return AgentResult(response={"error": message}, session_id=ctx.session_id, files=[]), {}
 
             prompt_vars["doc_file"] = file_override
 
         extra_tools = list(ctx.extra_tools or [])
 
-        agent_output = run_agent(
-            agent_name=ctx.agent_name,
-            input_text=description,
-            extra_tools=extra_tools,
-            session_id=ctx.session_id,
-            prompt_vars=prompt_vars,
+        return None, {
+            "agent_name": ctx.agent_name,
+            "input_text": description,
+            "extra_tools": extra_tools,
+            "session_id": ctx.session_id,
+            "prompt_vars": prompt_vars,
+        }
+
+    def handle(self, ctx: AgentContext) -> AgentResult:
+        early, run_kwargs = self._plan(ctx)
+        if early is not None:
+            return early
+        if direct_dispatch_enabled(ctx.agent_name, ctx.extra_tools):
+            return self._direct(ctx, run_kwargs)
+        return self._finish(ctx, run_kwargs["input_text"], run_agent(**run_kwargs))
+
+    async def handle_async(self, ctx: AgentContext) -> AgentResult:
+        # Registry reads and the non-JSON fallback search block; keep them off the event loop
+        early, run_kwargs = await asyncio.to_thread(self._plan, ctx)
+        if early is not None:
+            return early
+        if direct_dispatch_enabled(ctx.agent_name, ctx.extra_tools):
+            file = run_kwargs["prompt_vars"]["doc_file"]
+            if file:
+                history = await asyncio.to_thread(session_store.history_dicts, ctx.agent_name, ctx.session_id)
+                result = await chat_service.answer_async(
+                    file, run_kwargs["input_text"], history=history, **_PROFILE_CHAT_KWARGS
+                )
+                return self._profile_result(ctx, file, result.get("response"))
+            return await asyncio.to_thread(self._direct, ctx, run_kwargs)
+        agent_output = await run_agent_async(**run_kwargs)
+        return await asyncio.to_thread(self._finish, ctx, run_kwargs["input_text"], agent_output)
+
+    async def handle_stream(self, ctx: AgentContext) -> AsyncIterator[Tuple[str, Any]]:
+        """Yield agent stream events, then ``("result", AgentResult)``."""
+        early, run_kwargs = await asyncio.to_thread(self._plan, ctx)
+        if early is not None:
+            yield "result", early
+            return
+        if direct_dispatch_enabled(ctx.agent_name, ctx.extra_tools):
+            file = run_kwargs["prompt_vars"]["doc_file"]
+            if file:
+                history = await asyncio.to_thread(session_store.history_dicts, ctx.agent_name, ctx.session_id)
+                parts: List[str] = []
+                async for token in chat_service.answer_stream(
+                    file, run_kwargs["input_text"], history=history, **_PROFILE_CHAT_KWARGS
+                ):
+                    parts.append(token)
+                    yield "token", {"token": token}
+                yield "result", self._profile_result(ctx, file, "".join(parts))
+            else:
+                yield "result", await asyncio.to_thread(self._direct, ctx, run_kwargs)
+            return
+        agent_output: Any = ""
+        async for event, data in stream_agent(**run_kwargs):
+            if event == "output":
+                agent_output = data.get("output")
+                continue
+            yield event, data
+        yield "result", await asyncio.to_thread(self._finish, ctx, run_kwargs["input_text"], agent_output)
+
+    def _direct(self, ctx: AgentContext, run_kwargs: Dict[str, Any]) -> AgentResult:
+        """Deterministic routes without the agent LLM: profile chat, or translate + search."""
+        description = run_kwargs["input_text"]
+        file = run_kwargs["prompt_vars"]["doc_file"]
+        if file:
+            history = session_store.history_dicts(ctx.agent_name, ctx.session_id)
+            result = chat_service.answer(file, description, history=history, **_PROFILE_CHAT_KWARGS)
+            return self._profile_result(ctx, file, result.get("response"))
+        return self._match_result(ctx, {**_search_payload(description), "direct": True})
+
+    def _profile_result(self, ctx: AgentContext, file: str, response: Any) -> AgentResult:
+        response_text = response if isinstance(response, str) else str(response)
+        logger.info(
+            "Recruiter profile chat completed via tool routing | file=%s | session=%s",
+            file,
+            ctx.session_id,
         )
+        return AgentResult(response=response_text, session_id=ctx.session_id, files=[file])
 
+    def _finish(self, ctx: AgentContext, description: str, agent_output: Any) -> AgentResult:
+        file_override = (ctx.filename or "").strip()
         response_text = agent_output if isinstance(agent_output, str) else str(agent_output)
 
         if file_override:
-            logger.info(
-                "Recruiter profile chat completed via tool routing | file=%s | session=%s",
-                file_override,
-                ctx.session_id,
-            )
-            return AgentResult(response=response_text, session_id=ctx.session_id, files=[file_override])
+            return self._profile_result(ctx, file_override, response_text)
 
         try:
             payload = json.loads(response_text)
@@ -89,16 +176,10 @@ class RecruiterHandler(AgentHandler):
                 "Recruiter agent returned non-JSON output; applying fallback | session=%s",
                 ctx.session_id,
             )
-            translated_text, translated_flag = recruiter_service.translate_description(description)
-            matches = recruiter_service.search_candidates(translated_text)
-            payload = {
-                "query": translated_text,
-                "translated": translated_flag,
-                "matches": [match.as_dict() for match in matches],
-                "fallback": True,
-                "raw_response": response_text,
-            }
+            payload = {**_search_payload(description), "fallback": True, "raw_response": response_text}
+        return self._match_result(ctx, payload)
 
+    def _match_result(self, ctx: AgentContext, payload: Any) -> AgentResult:
         matches = payload.get("matches") if isinstance(payload, dict) else None
         files: List[str] = []
         if isinstance(matches, list):
@@ -4,7 +4,7 @@ from typing import Dict
 # Define agent configurations here. Each agent selects a subset of tools
 # by name and can have a distinct system prompt. Add more agents as needed.
 #
-# Prompt variables (handled by agent handlers via build_agent(prompt_vars=...)):
+# Prompt variables (supplied by agent handlers at invoke time via run_agent(prompt_vars=...)):
 # - Common: {doc_file} — if set by the handler, indicates the selected/active file for this session.
 #   Add new variables by referencing them in the agent's `system_prompt` and supplying them
 #   from the corresponding handler.
@@ -20,10 +20,14 @@ AGENTS: Dict[str, dict] = {
             "Compare pricing across the uploaded CSV files"
         ],
         "capabilities": ["AI", "Upload Enabled", "PDF/CSV"],
+        # With a selected non-CSV file, answer via chat_over_file's service call without the agent LLM
+        "direct_dispatch": True,
         "tools": [
             "list_agent_files",
             "initialize_insights",
             "chat_over_file",
+            "describe_csv",
+            "query_csv",
             "check_file_ready",
         ],
         "system_prompt": (
@@ -32,6 +36,7 @@ AGENTS: Dict[str, dict] = {
             "If a specific document has been selected for this session, it is provided as {doc_file}. When {doc_file} is set, restrict all tool calls to that file only. Do not switch files unless the user explicitly asks.\n"
             "- First call initialize_insights(file) with {doc_file} (or with the user-specified file if {doc_file} is not set). This call is idempotent; call it even if you are unsure whether indexing already exists.\n"
             "- After initialize_insights(file), immediately call chat_over_file(file, query) to answer using the file's content in the same turn.\n"
+            "- For numeric or tabular questions over a .csv file (totals, averages, counts, filters, comparisons), call describe_csv(file) and then query_csv(file, sql) with a SELECT over the view `data` instead of chat_over_file; answer from the exact rows returned.\n"
             "- If you need to verify whether a file is ready before answering, call check_file_ready(file) and report readiness concisely.\n"
             "- If the file name is missing or ambiguous and {doc_file} is not set, ask one brief clarifying question. You may call list_agent_files() to show options.\n"
             "- If the question is general or not grounded in a file and {doc_file} is not set, ask the user which uploaded file to use. Do not answer without a file.\n"
@@ -50,6 +55,8 @@ AGENTS: Dict[str, dict] = {
             "Looking for a bilingual customer success manager familiar with CRM tools",
         ],
         "capabilities": ["AI", "Resume Matching", "Upload Enabled"],
+        # Profile chat and translate + search run directly, without agent planning round trips
+        "direct_dispatch": True,
         "tools": [
             "chat_over_profile",
             "translate_job_description",
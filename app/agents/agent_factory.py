@@ -1,11 +1,14 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+import json
 import string
+import threading
 
 from langchain.agents import AgentExecutor, create_tool_calling_agent
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
 from app.core.config import settings
+from app.services.generic import http_clients
 from app.tools import get_tools_by_names
 from .agent_config import AGENTS
 from app.utils.Logging.logger import logger
@@ -20,6 +23,8 @@ def _create_llm(overrides: Optional[Dict[str, Any]] = None):
                 api_key=overrides.get("api_key", settings.OPENAI_API_KEY),
                 base_url=overrides.get("base_url"),
                 temperature=overrides.get("temperature", 0),
+                http_client=http_clients.sync_client(),
+                http_async_client=http_clients.async_client(),
             )
         except Exception as e:
             logger.error(f"LLM override creation failed, falling back to defaults: {e}")
@@ -32,53 +37,78 @@ def _create_llm(overrides: Optional[Dict[str, Any]] = None):
             base_url=settings.LOCAL_LLM_BASE_URL,
             api_key=settings.LOCAL_LLM_API_KEY,
             temperature=0,
+            http_client=http_clients.sync_client(),
+            http_async_client=http_clients.async_client(),
         )
     # Production: OpenAI hosted
     return ChatOpenAI(
         model=settings.OPENAI_MODEL,
         api_key=settings.OPENAI_API_KEY,
         temperature=0,
+        http_client=http_clients.sync_client(),
+        http_async_client=http_clients.async_client(),
     )
 
 
-def _render_prompt(template: str, prompt_vars: Optional[Dict[str, Any]]) -> str:
-    """Safely render a prompt; log missing placeholders and fall back on errors."""
-    if not prompt_vars:
-        return template
-    try:
-        fields = {fname for _, fname, _, _ in string.Formatter().parse(template) if fname}
-        missing = [f for f in fields if f not in (prompt_vars or {})]
-        if missing:
-            logger.warning(f"Prompt variables missing for placeholders: {missing}")
-        return template.format(**prompt_vars)
-    except Exception as e:
-        logger.error(f"Prompt render failed; using template as-is. Error: {e}")
-        return template
+# Tag on the agent runnable's events; streaming forwards only its chat-model tokens as answer text
+AGENT_LLM_TAG = "agent_llm"
+
+_llms: Dict[str, Any] = {}
+_executors: Dict[Tuple[str, Tuple[str, ...], str], AgentExecutor] = {}
+_cache_lock = threading.Lock()
+
+
+def _overrides_key(overrides: Optional[Dict[str, Any]]) -> str:
+    return json.dumps(overrides or {}, sort_keys=True, default=str)
+
+
+def get_llm(overrides: Optional[Dict[str, Any]] = None):
+    """Shared LLM per override set, so its HTTP client and connection pool are reused."""
+    key = _overrides_key(overrides)
+    llm = _llms.get(key)
+    if llm is None:
+        with _cache_lock:
+            llm = _llms.get(key)
+            if llm is None:
+                llm = _create_llm(overrides)
+                _llms[key] = llm
+    return llm
+
+
+def _prompt_variables(template: str) -> List[str]:
+    return [fname for _, fname, _, _ in string.Formatter().parse(template) if fname]
+
+
+def prompt_inputs(agent_name: str, prompt_vars: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Invoke-time values for every system prompt placeholder; missing ones render empty."""
+    cfg = AGENTS.get(agent_name) or {}
+    template = cfg.get("system_prompt") or ""
+    fields = _prompt_variables(template)
+    missing = [f for f in fields if f not in (prompt_vars or {})]
+    if missing and prompt_vars:
+        logger.warning(f"Prompt variables missing for placeholders: {missing}")
+    return {f: ("" if (prompt_vars or {}).get(f) is None else str(prompt_vars[f])) for f in fields}
 
 
 def build_agent(
     agent_name,
     *,
     extra_tools: Optional[List[str]] = None,
-    prompt_vars: Optional[Dict[str, Any]] = None,
 ) -> AgentExecutor:
     """
     Build an AgentExecutor using the named agent configuration and optional extra tools.
+
+    System prompt placeholders (e.g. {doc_file}) stay template variables; supply
+    them per request via ``prompt_inputs``.
     """
     cfg = AGENTS.get(agent_name)
     if not cfg:
         raise ValueError(f"Unknown agent: {agent_name}")
 
-    tool_names = list(cfg.get("tools", []))
-    if extra_tools:
-        # Allow callers to extend the toolset on the fly
-        tool_names.extend([t for t in (extra_tools or []) if t not in tool_names])
-
-    tools = get_tools_by_names(tool_names)
+    tool_names = _tool_names(cfg, extra_tools)
+    tools = get_tools_by_names(list(tool_names))
 
     system_prompt = cfg.get("system_prompt") or "You are a helpful assistant."
-    # Allow handlers to inject dynamic variables into the prompt in a generic way
-    system_prompt = _render_prompt(system_prompt, prompt_vars)
     prompt = ChatPromptTemplate.from_messages([
         ("system", system_prompt),
         MessagesPlaceholder(variable_name="chat_history"),
@@ -87,14 +117,42 @@ def build_agent(
     ])
 
     llm_overrides = cfg.get("llm") if isinstance(cfg.get("llm"), dict) else None
-    llm = _create_llm(llm_overrides)
+    llm = get_llm(llm_overrides)
 
-    agent = create_tool_calling_agent(llm, tools, prompt)
+    # Tag the agent's own runnable: its chat-model runs inherit the tag, while LLM calls made
+    # inside tools (which the executor runs outside this runnable) do not
+    agent = create_tool_calling_agent(llm, tools, prompt).with_config(tags=[AGENT_LLM_TAG])
     # Add a safety cap to avoid runaway tool loops
     executor = AgentExecutor(agent=agent, tools=tools, verbose=False, max_iterations=6)
     return executor
 
 
+def _tool_names(cfg: Dict[str, Any], extra_tools: Optional[List[str]]) -> Tuple[str, ...]:
+    tool_names = list(cfg.get("tools", []))
+    if extra_tools:
+        # Allow callers to extend the toolset on the fly
+        tool_names.extend([t for t in (extra_tools or []) if t not in tool_names])
+    return tuple(tool_names)
+
+
+def get_agent(agent_name, *, extra_tools: Optional[List[str]] = None) -> AgentExecutor:
+    """Cached executor per (agent, effective tool set, LLM overrides); built on first use."""
+    cfg = AGENTS.get(agent_name)
+    if not cfg:
+        raise ValueError(f"Unknown agent: {agent_name}")
+    llm_overrides = cfg.get("llm") if isinstance(cfg.get("llm"), dict) else None
+    key = (agent_name, _tool_names(cfg, extra_tools), _overrides_key(llm_overrides))
+    executor = _executors.get(key)
+    if executor is None:
+        with _cache_lock:
+            executor = _executors.get(key)
+            if executor is None:
+                executor = build_agent(agent_name, extra_tools=extra_tools)
+                _executors[key] = executor
+                logger.info(f"Agent executor built | agent={agent_name} | tools={list(key[1])}")
+    return executor
+
+
 def list_agents() -> Dict[str, Any]:
     """Return available agent names and metadata for UI rendering."""
     out: Dict[str, Any] = {}
@@ -0,0 +1,63 @@
+from fastapi import APIRouter, HTTPException
+from typing import Any, Dict, Optional
+
+from app.services.generic import answer_cache, embedding_cache, http_clients, text_cache, translation_memo, vector_gc
+
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/cache/embeddings")
+def embedding_cache_stats() -> Dict[str, Any]:
+    """Chunk-embedding cache: hit rate and evictions for this process, persisted entry count."""
+    return embedding_cache.stats()
+
+
+@router.get("/cache/extracted-text")
+def extracted_text_cache_stats() -> Dict[str, Any]:
+    return text_cache.stats()
+
+
+@router.delete("/cache/extracted-text")
+def purge_extracted_text_cache(file_hash: Optional[str] = None) -> Dict[str, Any]:
+    """Purge the whole extracted-text cache, or only the entry for `file_hash`."""
+    try:
+        return text_cache.purge(file_hash)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.get("/cache/answers")
+def answer_cache_stats() -> Dict[str, Any]:
+    return answer_cache.stats()
+
+
+@router.delete("/cache/answers")
+def clear_answer_cache(collection: Optional[str] = None) -> Dict[str, Any]:
+    return {"removed": answer_cache.clear(collection)}
+
+
+@router.get("/cache/translations")
+def translation_memo_stats() -> Dict[str, Any]:
+    return translation_memo.stats()
+
+
+@router.get("/http-pool")
+def http_pool_stats() -> Dict[str, Any]:
+    """Shared LLM/embedding HTTP transport: configuration, request counters and pool state."""
+    return http_clients.stats()
+
+
+@router.get("/vector-gc")
+def vector_gc_report() -> Dict[str, Any]:
+    """Dry run: orphaned Chroma collections and the space deleting them would reclaim."""
+    return vector_gc.sweep(dry_run=True)
+
+
+@router.post("/vector-gc")
+def run_vector_gc(compact: Optional[bool] = None) -> Dict[str, Any]:
+    """Delete orphaned Chroma collections now; `compact` overrides VECTOR_GC_COMPACT."""
+    result = vector_gc.sweep(dry_run=False, compact_store=compact)
+    if result.get("skipped"):
+        raise HTTPException(status_code=409, detail=result.get("reason"))
+    return result
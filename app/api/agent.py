@@ -1,12 +1,17 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
 import json
 import re
 
 from app.agents.agent_factory import list_agents
-from app.agent_processing import handle_agent_query, handle_agent_files
+from app.agent_processing import handle_agent_query_async, handle_agent_files, stream_agent_query
+from app.agent_processing.batch import handle_agent_batch_async
+from app.core.config import settings
 from app.services.generic import ingestion_db
+from app.utils.Logging.logger import logger
 
 
 router = APIRouter(prefix="/agent", tags=["agent"])
@@ -32,6 +37,17 @@ class ProfileChatRequest(BaseModel):
         extra = "ignore"
 
 
+class BatchQueryRequest(BaseModel):
+    filename: str
+    questions: List[str]
+    k: Optional[int] = None
+    score_threshold: Optional[float] = None
+    strict: Optional[bool] = None
+
+    class Config:
+        extra = "ignore"
+
+
 def _validate_text(text: str) -> Optional[str]:
     """Return error message if invalid, else None."""
     allowed = re.compile(r"^[A-Za-z0-9\s\-_/\.,:;@()<>\+\#&]*$")
@@ -51,13 +67,29 @@ def _resolve_agent_name(name_or_slug: str) -> Optional[str]:
     lower_map = {k.lower(): k for k in available}
     return lower_map.get((name_or_slug or "").lower())
 
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+async def _sse_stream(events: AsyncIterator[Tuple[str, Any]]) -> AsyncIterator[str]:
+    """Encode (event, data) pairs as server-sent events; failures become an ``error`` event."""
+    try:
+        async for event, data in events:
+            yield _sse(event, data)
+    except Exception as exc:
+        logger.error("Agent stream failed | error=%s", exc)
+        yield _sse("error", {"detail": str(exc)})
+
 @router.get("/list")
 def list_available_agents() -> Dict[str, Any]:
     return {"agents": list_agents()}
 
 
 @router.post("/query/{agent}")
-def run_agent_by_path(agent: str, query: AgentPathQuery) -> Dict[str, Any]:
+async def run_agent_by_path(agent: str, query: AgentPathQuery) -> Dict[str, Any]:
     err = _validate_text(query.input)
     if err:
         return {"response": err}
@@ -66,7 +98,7 @@ def run_agent_by_path(agent: str, query: AgentPathQuery) -> Dict[str, Any]:
     if not resolved:
         raise HTTPException(status_code=404, detail="Unknown agent")
 
-    return handle_agent_query(
+    return await handle_agent_query_async(
         input_text=query.input,
         agent=resolved,
         extra_tools=query.extra_tools,
@@ -75,6 +107,64 @@ def run_agent_by_path(agent: str, query: AgentPathQuery) -> Dict[str, Any]:
     )
 
 
+@router.post("/query/{agent}/stream")
+async def stream_agent_by_path(agent: str, query: AgentPathQuery) -> StreamingResponse:
+    """SSE variant of /query/{agent}: tool_start, tool_end, tool_token, token, then done."""
+    resolved = _resolve_agent_name(agent)
+    if not resolved:
+        raise HTTPException(status_code=404, detail="Unknown agent")
+
+    async def _events() -> AsyncIterator[Tuple[str, Any]]:
+        err = _validate_text(query.input)
+        if err:
+            yield "done", {"response": err}
+            return
+        async for item in stream_agent_query(
+            input_text=query.input,
+            agent=resolved,
+            extra_tools=query.extra_tools,
+            session_id=query.session_id,
+            filename=query.filename,
+        ):
+            yield item
+
+    return StreamingResponse(_sse_stream(_events()), media_type="text/event-stream", headers=_SSE_HEADERS)
+
+
+@router.post("/{agent}/batch")
+async def run_agent_batch(agent: str, payload: BatchQueryRequest) -> Dict[str, Any]:
+    """Answer many questions over one file; results are returned in question order."""
+    resolved = _resolve_agent_name(agent)
+    if not resolved:
+        raise HTTPException(status_code=404, detail="Unknown agent")
+
+    filename = (payload.filename or "").strip()
+    if not filename:
+        raise HTTPException(status_code=400, detail="filename is required")
+    if not payload.questions:
+        raise HTTPException(status_code=400, detail="questions is required")
+    if len(payload.questions) > int(settings.BATCH_MAX_QUESTIONS):
+        raise HTTPException(
+            status_code=400, detail=f"At most {settings.BATCH_MAX_QUESTIONS} questions per batch"
+        )
+    for i, question in enumerate(payload.questions):
+        err = "question is empty" if not (question or "").strip() else _validate_text(question)
+        if err:
+            raise HTTPException(status_code=400, detail=f"questions[{i}]: {err}")
+
+    try:
+        return await handle_agent_batch_async(
+            agent=resolved,
+            filename=filename,
+            questions=payload.questions,
+            k=payload.k,
+            score_threshold=payload.score_threshold,
+            strict=payload.strict,
+        )
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+
 @router.get("/listfiles/{agent}")
 def list_agent_files(agent: str) -> Dict[str, Any]:
     resolved = _resolve_agent_name(agent)
@@ -83,8 +173,8 @@ def list_agent_files(agent: str) -> Dict[str, Any]:
     return handle_agent_files(agent=resolved)
 
 
-@router.post("/profilechat/{agent}")
-def chat_profile(agent: str, payload: ProfileChatRequest) -> Dict[str, Any]:
+async def _validate_profile_chat(agent: str, payload: ProfileChatRequest) -> Tuple[str, str]:
+    """Return (resolved agent, filename) or raise the appropriate HTTP error."""
     resolved = _resolve_agent_name(agent)
     if not resolved:
         raise HTTPException(status_code=404, detail="Unknown agent")
@@ -103,23 +193,17 @@ def chat_profile(agent: str, payload: ProfileChatRequest) -> Dict[str, Any]:
         raise HTTPException(status_code=400, detail="filename is required")
 
     try:
-        rows = ingestion_db.list_documents(resolved)
+        rows = await asyncio.to_thread(ingestion_db.list_documents, resolved)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Unable to load documents for {resolved}: {exc}")
 
     known_files = {r.get("file") for r in rows if isinstance(r, dict) and isinstance(r.get("file"), str)}
     if filename not in known_files:
         raise HTTPException(status_code=404, detail=f"File '{filename}' is not registered for agent '{resolved}'")
+    return resolved, filename
 
-    # Reuse agent processing pipeline so prompt/tool orchestration is consistent
-    result = handle_agent_query(
-        input_text=payload.query,
-        agent=resolved,
-        extra_tools=payload.extra_tools,
-        session_id=payload.session_id,
-        filename=filename,
-    )
 
+def _profile_chat_response(result: Dict[str, Any]) -> Dict[str, Any]:
     response_content = result.get("response")
     if isinstance(response_content, (dict, list)):
         response_text = json.dumps(response_content, ensure_ascii=False)
@@ -131,3 +215,36 @@ def chat_profile(agent: str, payload: ProfileChatRequest) -> Dict[str, Any]:
         "session_id": result.get("session_id"),
         "files": result.get("files", []),
     }
+
+
+@router.post("/profilechat/{agent}")
+async def chat_profile(agent: str, payload: ProfileChatRequest) -> Dict[str, Any]:
+    resolved, filename = await _validate_profile_chat(agent, payload)
+
+    # Reuse agent processing pipeline so prompt/tool orchestration is consistent
+    result = await handle_agent_query_async(
+        input_text=payload.query,
+        agent=resolved,
+        extra_tools=payload.extra_tools,
+        session_id=payload.session_id,
+        filename=filename,
+    )
+    return _profile_chat_response(result)
+
+
+@router.post("/profilechat/{agent}/stream")
+async def stream_chat_profile(agent: str, payload: ProfileChatRequest) -> StreamingResponse:
+    """SSE variant of /profilechat/{agent}; the final ``done`` event matches the JSON response."""
+    resolved, filename = await _validate_profile_chat(agent, payload)
+
+    async def _events() -> AsyncIterator[Tuple[str, Any]]:
+        async for event, data in stream_agent_query(
+            input_text=payload.query,
+            agent=resolved,
+            extra_tools=payload.extra_tools,
+            session_id=payload.session_id,
+            filename=filename,
+        ):
+            yield event, (_profile_chat_response(data) if event == "done" else data)
+
+    return StreamingResponse(_sse_stream(_events()), media_type="text/event-stream", headers=_SSE_HEADERS)
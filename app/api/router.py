@@ -1,4 +1,4 @@
-from app.api import upload, agent
+from app.api import upload, agent, admin
 from fastapi import APIRouter
 
 
@@ -6,3 +6,4 @@ from fastapi import APIRouter
 router = APIRouter()
 router.include_router(agent.router)
 router.include_router(upload.router, prefix="/agent")
+router.include_router(admin.router)
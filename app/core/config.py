@@ -1,7 +1,7 @@
 # core/config.py
 from pydantic_settings import BaseSettings
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 from dotenv import load_dotenv
 from pydantic import Field
 
@@ -21,6 +21,100 @@ class Settings(BaseSettings):
     LOCAL_LLM_API_KEY: str = Field(default="ollama")  # dummy; Ollama ignores it
     HUGGINGFACE_EMBEDDING_MODEL: str = Field(default="sentence-transformers/all-MiniLM-L6-v2")
 
+    # === Embeddings ===
+    # Build the embedding backend at startup so the first request does not load weights
+    EMBEDDINGS_WARMUP: bool = Field(default=True)
+    # Persistent chunk-embedding cache under DB_DIR (content-addressed, LRU-evicted)
+    EMBEDDING_CACHE_ENABLED: bool = Field(default=True)
+    EMBEDDING_CACHE_MAX_ENTRIES: int = Field(default=200_000)
+    # In-memory LRU of query vectors used by retrieval (0 disables)
+    QUERY_EMBEDDING_CACHE_SIZE: int = Field(default=1024)
+
+    # === HTTP transport (shared by OpenAI, ChatOpenAI and OpenAIEmbeddings clients) ===
+    HTTP_MAX_CONNECTIONS: int = Field(default=100)
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = Field(default=20)
+    HTTP_KEEPALIVE_EXPIRY_S: float = Field(default=30.0)
+    HTTP_TIMEOUT_S: float = Field(default=60.0)
+    HTTP_CONNECT_TIMEOUT_S: float = Field(default=10.0)
+    # Requires the 'h2' package (httpx[http2]); falls back to HTTP/1.1 without it
+    HTTP2_ENABLED: bool = Field(default=False)
+
+    # === Grounded answers ===
+    # Tokens of retrieved context packed into the answer prompt; per-model overrides by model name
+    CHAT_CONTEXT_TOKENS: int = Field(default=1500)
+    CHAT_CONTEXT_TOKENS_BY_MODEL: Dict[str, int] = Field(default_factory=dict)
+
+    # === Batch questions (/agent/{agent}/batch) ===
+    BATCH_MAX_QUESTIONS: int = Field(default=200)
+    # Completions in flight per batch request
+    BATCH_LLM_CONCURRENCY: int = Field(default=8)
+
+    # === Answer cache ===
+    # Grounded answers per (collection, normalized query); dropped when the collection changes
+    ANSWER_CACHE_ENABLED: bool = Field(default=True)
+    ANSWER_CACHE_MAX_ENTRIES: int = Field(default=2048)
+    ANSWER_CACHE_TTL_S: float = Field(default=3600.0)
+    # Also reuse answers for near-identical queries: cosine similarity of query embeddings
+    # at or above this value (0 disables similarity matching)
+    ANSWER_CACHE_SIMILARITY: float = Field(default=0.0)
+
+    # === Recruiter search ===
+    # "index": one query over the recruiter-wide candidate collection; "per_file": fan out per resume
+    RECRUITER_SEARCH_MODE: str = Field(default="index")
+    RECRUITER_SEARCH_MAX_WORKERS: int = Field(default=8)
+    # Overall deadline for the per-file fan-out; slower files are reported as skipped (0 disables)
+    RECRUITER_SEARCH_DEADLINE_S: float = Field(default=10.0)
+
+    # === Recruiter translation ===
+    # Remember translated job descriptions by text hash (DB_DIR/translations.sqlite3)
+    TRANSLATION_MEMO_ENABLED: bool = Field(default=True)
+
+    # === Uploads ===
+    # Uploads are streamed to disk in chunks of this size (bytes)
+    UPLOAD_CHUNK_SIZE: int = Field(default=1024 * 1024)
+
+    # === Ingestion job queue ===
+    # Worker processes for load/split/embed; also the number of jobs processed concurrently
+    INGEST_WORKERS: int = Field(default=2)
+    INGEST_MAX_ATTEMPTS: int = Field(default=3)
+    INGEST_RETRY_BACKOFF_S: float = Field(default=10.0)
+    INGEST_POLL_INTERVAL_S: float = Field(default=1.0)
+    # Embedded batches buffered between a worker process and the writer
+    INGEST_QUEUE_DEPTH: int = Field(default=4)
+
+    # === PDF extraction ===
+    # Process workers for page-range extraction of large PDFs (<=1 uses PyPDFLoader only)
+    PDF_EXTRACT_WORKERS: int = Field(default=4)
+    # Only PDFs with at least this many pages are extracted in parallel
+    PDF_PARALLEL_MIN_PAGES: int = Field(default=64)
+
+    # Cache parsed documents per file hash under DB_DIR/extracted_text
+    EXTRACTED_TEXT_CACHE_ENABLED: bool = Field(default=True)
+
+    # === CSV ingestion ===
+    # CSVs are streamed in windows of this many rows (split, embedded and written per window)
+    CSV_STREAM_BATCH_ROWS: int = Field(default=1000)
+    # CSVs are also loaded into typed SQLite tables (DB_DIR/csv_tables.sqlite3) for query_csv
+    CSV_TABLES_ENABLED: bool = Field(default=True)
+    CSV_QUERY_MAX_ROWS: int = Field(default=200)
+    CSV_QUERY_TIMEOUT_S: float = Field(default=5.0)
+
+    # === Vector store GC ===
+    # Seconds between scheduled sweeps of collections no registry row references (<=0 disables)
+    VECTOR_GC_INTERVAL_S: float = Field(default=6 * 3600.0)
+    # VACUUM chroma.sqlite3 after a sweep that deleted collections
+    VECTOR_GC_COMPACT: bool = Field(default=True)
+
+    # === Agent sessions ===
+    # Per-session chat history kept within this many tokens; older turns are rolled into a summary
+    SESSION_TOKEN_BUDGET: int = Field(default=2000)
+    SESSION_SUMMARY_MAX_TOKENS: int = Field(default=400)
+    # "extractive" keeps the opening of each rolled-up turn; "llm" asks the agent LLM to summarize
+    SESSION_SUMMARY_MODE: str = Field(default="extractive")
+    # Sessions held in memory; least recently used ones spill to DB_DIR/sessions.sqlite3
+    SESSION_MEMORY_MAX_SESSIONS: int = Field(default=1000)
+    SESSION_TTL_S: float = Field(default=7 * 24 * 3600.0)
+
     # === Storage roots ===
     # Set BASE_DIR via env (e.g., BASE_DIR=/mnt/storage). Defaults to /mnt/storage in prod-like
     # environments; override locally as needed.
@@ -1,18 +1,33 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Set, Tuple
 
+from langchain_chroma import Chroma
 from langchain_core.messages import HumanMessage, SystemMessage
 
-from app.agents.agent_factory import _create_llm
-from app.services.generic import ingestion_db, chat_service
+from app.agents.agent_factory import get_llm
+from app.core.config import settings
+from app.services.generic import ingestion_db, chat_service, embeddings, insight_services, translation_memo, vector_store
+from app.utils.text import language
 from app.utils.Logging.logger import logger
 
 
 AGENT_NAME = "recruiter"
 
+# Recruiter-wide collection holding every resume chunk, tagged with metadata {"file": ...}
+CANDIDATE_INDEX_COLLECTION = "recruiter-candidates"
+# Chunks fetched per requested candidate; several chunks usually belong to the same resume
+_CHUNKS_PER_CANDIDATE = 8
+_MIN_INDEX_K = 40
+
+_index_lock = threading.Lock()
+_indexed_files: Optional[Set[str]] = None
+
 
 @dataclass
 class CandidateMatch:
@@ -37,33 +52,31 @@ class CandidateMatch:
         }
 
 
-def _is_probably_english(text: str) -> bool:
-    if not text:
-        return True
-    ascii_chars = sum(1 for ch in text if ch.isascii())
-    ratio = ascii_chars / max(len(text), 1)
-    return ratio >= 0.85
-
+@dataclass
+class CandidateSearch:
+    """Search outcome: ranked matches plus per-file diagnostics for the fan-out path."""
 
-def translate_description(description: str) -> Tuple[str, bool]:
-    """Translate job description to English when needed.
+    matches: List[CandidateMatch]
+    mode: str
+    skipped: List[Dict[str, str]] = field(default_factory=list)
+    timings_ms: Dict[str, float] = field(default_factory=dict)
 
-    Returns the translated text and a flag indicating whether translation occurred.
-    """
-    cleaned = (description or "").strip()
-    if not cleaned:
-        return "", False
+    def diagnostics(self) -> Dict[str, Any]:
+        return {
+            "search_mode": self.mode,
+            "skipped": self.skipped,
+            "timings_ms": self.timings_ms,
+        }
 
-    if _is_probably_english(cleaned):
-        return cleaned, False
 
+def _llm_translate(text: str) -> Optional[str]:
     try:
-        llm = _create_llm(None)
+        llm = get_llm(None)
         prompt = (
             "Translate the following job description into clear English. "
             "If the text is already in English, return it unchanged. "
             "Respond with only the translated text.\n\n"
-            f"Job description:\n{cleaned}"
+            f"Job description:\n{text}"
         )
         result = llm.invoke(
             [
@@ -71,12 +84,34 @@ def translate_description(description: str) -> Tuple[str, bool]:
                 HumanMessage(content=prompt),
             ]
         )
-        translated = (getattr(result, "content", "") or "").strip()
-        if translated:
-            changed = translated.lower() != cleaned.lower()
-            return translated, changed
+        return (getattr(result, "content", "") or "").strip() or None
     except Exception as exc:  # pragma: no cover - defensive fallback
         logger.warning("Recruiter translation failed; using original text | error=%s", exc)
+        return None
+
+
+def translate_description(description: str) -> Tuple[str, bool]:
+    """Translate job description to English when needed.
+
+    Returns the translated text and a flag indicating whether translation occurred.
+    Translations are memoized by text hash, so the agent tool and the handler's
+    fallback path translate each distinct description at most once.
+    """
+    cleaned = (description or "").strip()
+    if not cleaned:
+        return "", False
+
+    lang, confidence = language.detect_language(cleaned)
+    # Only English stopword hits count as evidence; unclassified text (Polish,
+    # Vietnamese, keyword lists) goes to the memo, and the prompt returns English unchanged
+    if lang == "en":
+        return cleaned, False
+
+    logger.info("Recruiter description language | lang=%s | confidence=%.2f", lang, confidence)
+    translated = translation_memo.translate_once(cleaned, _llm_translate, source_lang=lang)
+    if translated:
+        changed = translated.lower() != cleaned.lower()
+        return translated, changed
     return cleaned, False
 
 
@@ -88,24 +123,172 @@ def _list_candidate_records() -> List[Dict[str, Any]]:
         return []
 
 
-def search_candidates(query: str, *, max_results: int = 5) -> List[CandidateMatch]:
-    records = _list_candidate_records()
-    matches: List[CandidateMatch] = []
+def _candidate_index() -> Chroma:
+    return vector_store.get_store(CANDIDATE_INDEX_COLLECTION)
+
+
+def _load_indexed_files(index: Chroma) -> Set[str]:
+    global _indexed_files
+    if _indexed_files is None:
+        data = index._collection.get(include=["metadatas"])  # type: ignore[attr-defined]
+        _indexed_files = {
+            m.get("file") for m in (data.get("metadatas") or []) if isinstance(m, dict) and m.get("file")
+        }
+    return _indexed_files
+
+
+def index_candidate(file: str) -> int:
+    """Copy a resume's chunks, with their stored vectors, into the recruiter-wide index.
+
+    Replaces any chunks previously indexed for ``file``. Nothing is re-embedded.
+    Returns the number of chunks indexed.
+    """
+    collection = insight_services.collection_name_for(file)
+    ids: List[str] = []
+    vectors: Any = []
+    documents: List[str] = []
+    metadatas: List[Any] = []
+    # Not built yet (or a new revision pending): don't create an empty collection as a side effect
+    if vector_store.collection_count(collection) > 0:
+        source = vector_store.get_store(collection)
+        data = source._collection.get(include=["documents", "metadatas", "embeddings"])  # type: ignore[attr-defined]
+        ids = list(data.get("ids") or [])
+        vectors = data.get("embeddings")
+        documents = data.get("documents") or []
+        metadatas = data.get("metadatas") or []
+
+    index = _candidate_index()
+    with _index_lock:
+        index._collection.delete(where={"file": file})  # type: ignore[attr-defined]
+        if ids:
+            index._collection.upsert(  # type: ignore[attr-defined]
+                ids=[f"{file}::{i}" for i in ids],
+                embeddings=[[float(x) for x in v] for v in vectors],
+                documents=list(documents),
+                metadatas=[{**(m or {}), "file": file} for m in metadatas],
+            )
+        if _indexed_files is not None:
+            # Only a file whose chunks were copied counts as indexed; others are backfilled later
+            if ids:
+                _indexed_files.add(file)
+            else:
+                _indexed_files.discard(file)
+    logger.info(
+        "Recruiter candidate indexed | file=%s | collection=%s | chunks=%d",
+        file,
+        collection,
+        len(ids),
+    )
+    return len(ids)
+
+
+def _ensure_indexed(index: Chroma, files: List[str]) -> None:
+    """Backfill resumes registered before the candidate index existed."""
+    with _index_lock:
+        indexed = set(_load_indexed_files(index))
+    for file in files:
+        if file in indexed:
+            continue
+        try:
+            index_candidate(file)
+        except Exception as exc:
+            logger.warning("Recruiter candidate backfill failed | file=%s | error=%s", file, exc)
+
+
+def _build_match(record: Dict[str, Any], file: str, doc: str, meta: Any, score: float) -> CandidateMatch:
+    snippet = (doc or "").strip().replace("\n", " ")
+    if len(snippet) > 320:
+        snippet = snippet[:317].rstrip() + "..."
+
+    candidate_name = record.get("title") or Path(file).stem
+    keywords = record.get("keywords") if isinstance(record, dict) else None
+    vector_collection = record.get("vector_collection") if isinstance(record, dict) else None
+    metadata = meta if isinstance(meta, dict) else None
+    return CandidateMatch(
+        file=file,
+        candidate_name=candidate_name,
+        score=float(score),
+        highlight=snippet,
+        vector_collection=vector_collection,
+        keywords=keywords if isinstance(keywords, list) else None,
+        metadata=metadata,
+    )
+
+
+def _search_index(query: str, records_by_file: Dict[str, Dict[str, Any]], max_results: int) -> List[CandidateMatch]:
+    """One nearest-neighbour query over all resumes, grouped by file (best chunk wins)."""
+    index = _candidate_index()
+    _ensure_indexed(index, list(records_by_file))
+
+    k = max(max_results * _CHUNKS_PER_CANDIDATE, _MIN_INDEX_K)
+    pairs = chat_service._search_by_vector(index, embeddings.embed_query(query), k)
+    scores = chat_service._normalize_scores([float(s) for (_d, s) in pairs])
+
+    best: Dict[str, Tuple[str, Dict[str, Any], float]] = {}
+    for (doc, _raw), score in zip(pairs, scores):
+        meta = dict(doc.metadata or {})
+        file = meta.pop("file", None)
+        # Skip chunks of resumes that have since been removed from the registry
+        if file not in records_by_file:
+            continue
+        if file not in best or score > best[file][2]:
+            best[file] = (doc.page_content or "", meta, score)
 
+    return [
+        _build_match(records_by_file[file], file, doc, meta, score)
+        for file, (doc, meta, score) in best.items()
+    ]
+
+
+def _retrieve_timed(file: str, query: str) -> Tuple[List[Tuple[str, Dict[str, Any], float]], float]:
+    started = time.perf_counter()
+    hits = chat_service.retrieve(
+        file,
+        query,
+        k=5,
+        score_threshold=0.45,
+        strict=False,
+    )
+    return hits, (time.perf_counter() - started) * 1000.0
+
+
+def _search_per_file(query: str, records: List[Dict[str, Any]]) -> CandidateSearch:
+    """Per-collection search fanned out over a bounded thread pool with an overall deadline.
+
+    Files that fail or miss the deadline are reported in ``skipped`` rather than
+    blocking the response.
+    """
+    files: Dict[str, Dict[str, Any]] = {}
     for record in records:
         file = record.get("file") if isinstance(record, dict) else None
-        if not isinstance(file, str):
-            continue
+        if isinstance(file, str):
+            files[file] = record
 
+    result = CandidateSearch(matches=[], mode="per_file")
+    if not files:
+        return result
+
+    workers = max(1, min(int(settings.RECRUITER_SEARCH_MAX_WORKERS), len(files)))
+    deadline = float(settings.RECRUITER_SEARCH_DEADLINE_S)
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="recruiter-search")
+    try:
+        futures = {pool.submit(_retrieve_timed, file, query): file for file in files}
+        done, pending = wait(futures, timeout=deadline if deadline > 0 else None)
+    finally:
+        # Do not wait for stragglers; queued lookups are cancelled
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    for future in pending:
+        file = futures[future]
+        result.skipped.append({"file": file, "reason": "deadline"})
+        logger.warning("Recruiter search skipped file past deadline | file=%s | deadline_s=%.1f", file, deadline)
+
+    for future in done:
+        file = futures[future]
         try:
-            hits = chat_service.retrieve(
-                file,
-                query,
-                k=5,
-                score_threshold=0.45,
-                strict=False,
-            )
+            hits, elapsed_ms = future.result()
         except Exception as exc:
+            result.skipped.append({"file": file, "reason": f"error: {exc}"})
             logger.warning(
                 "Recruiter search skipped file due to retrieval failure | file=%s | error=%s",
                 file,
@@ -113,6 +296,7 @@ def search_candidates(query: str, *, max_results: int = 5) -> List[CandidateMatc
             )
             continue
 
+        result.timings_ms[file] = round(elapsed_ms, 1)
         if not hits:
             logger.debug(
                 "Recruiter search found no hits above threshold | file=%s | query=%s",
@@ -122,38 +306,61 @@ def search_candidates(query: str, *, max_results: int = 5) -> List[CandidateMatc
             continue
 
         top_doc, top_meta, top_score = hits[0]
-        snippet = (top_doc or "").strip().replace("\n", " ")
-        if len(snippet) > 320:
-            snippet = snippet[:317].rstrip() + "..."
-
-        candidate_name = record.get("title") or Path(file).stem
-        keywords = record.get("keywords") if isinstance(record, dict) else None
-        vector_collection = record.get("vector_collection") if isinstance(record, dict) else None
-        metadata = top_meta if isinstance(top_meta, dict) else None
-
-        matches.append(
-            CandidateMatch(
-                file=file,
-                candidate_name=candidate_name,
-                score=float(top_score),
-                highlight=snippet,
-                vector_collection=vector_collection,
-                keywords=keywords if isinstance(keywords, list) else None,
-                metadata=metadata,
-            )
-        )
+        result.matches.append(_build_match(files[file], file, top_doc, top_meta, top_score))
 
-    matches.sort(key=lambda m: m.score, reverse=True)
+    slowest = sorted(result.timings_ms.items(), key=lambda kv: kv[1], reverse=True)[:3]
     logger.info(
-        "Recruiter search candidates completed | query=%.40s | results=%d",
+        "Recruiter per-file search | files=%d | workers=%d | skipped=%d | slowest=%s",
+        len(files),
+        workers,
+        len(result.skipped),
+        slowest,
+    )
+    return result
+
+
+def search_candidates_detailed(query: str, *, max_results: int = 5) -> CandidateSearch:
+    """Rank candidates for ``query`` and return matches with search diagnostics."""
+    records = _list_candidate_records()
+    records_by_file: Dict[str, Dict[str, Any]] = {}
+    for record in records:
+        file = record.get("file") if isinstance(record, dict) else None
+        if isinstance(file, str):
+            records_by_file[file] = record
+
+    mode = (settings.RECRUITER_SEARCH_MODE or "index").lower()
+    result: Optional[CandidateSearch] = None
+    if mode == "index" and records_by_file:
+        started = time.perf_counter()
+        try:
+            matches = _search_index(query, records_by_file, max_results)
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            result = CandidateSearch(matches=matches, mode="index", timings_ms={"index": round(elapsed_ms, 1)})
+        except Exception as exc:
+            logger.warning("Recruiter candidate index search failed; searching per file | error=%s", exc)
+    if result is None:
+        result = _search_per_file(query, records)
+
+    result.matches.sort(key=lambda m: m.score, reverse=True)
+    result.matches = result.matches[:max_results]
+    logger.info(
+        "Recruiter search candidates completed | query=%.40s | mode=%s | results=%d",
         query,
-        len(matches),
+        result.mode,
+        len(result.matches),
     )
-    return matches[:max_results]
+    return result
+
+
+def search_candidates(query: str, *, max_results: int = 5) -> List[CandidateMatch]:
+    return search_candidates_detailed(query, max_results=max_results).matches
 
 
 __all__ = [
     "translate_description",
     "search_candidates",
+    "search_candidates_detailed",
+    "index_candidate",
     "CandidateMatch",
+    "CandidateSearch",
 ]
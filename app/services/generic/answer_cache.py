@@ -0,0 +1,152 @@
+"""In-process cache of grounded answers per (vector collection, normalized query).
+
+Entries remember the collection's write generation (see ``vector_store``); any
+rebuild, incremental re-index or facts document bumps it, so stale answers are
+never served. Optionally, a query whose embedding is close enough to a cached
+query of the same collection reuses that answer (``ANSWER_CACHE_SIMILARITY``).
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.generic import embeddings, vector_store
+from app.utils.Logging.logger import logger
+
+
+@dataclass
+class _Entry:
+    answer: str
+    generation: int
+    expires_at: float
+    vector: Optional[List[float]] = None
+
+
+# key: (collection, params, normalized query)
+_Key = Tuple[str, Tuple[Any, ...], str]
+
+_entries: "OrderedDict[_Key, _Entry]" = OrderedDict()
+_lock = threading.Lock()
+_stats = {"hits": 0, "similar_hits": 0, "misses": 0, "stale": 0}
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form; trailing punctuation is ignored."""
+    text = " ".join((query or "").lower().split())
+    return re.sub(r"[\s?.!]+$", "", text)
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    na = math.sqrt(sum(x * x for x in a))
+    nb = math.sqrt(sum(y * y for y in b))
+    return dot / (na * nb) if na and nb else 0.0
+
+
+def _similarity_enabled() -> bool:
+    return float(settings.ANSWER_CACHE_SIMILARITY) > 0
+
+
+def lookup(collection: str, query: str, *, params: Tuple[Any, ...] = ()) -> Optional[str]:
+    """Return a cached answer for the query against the collection's current contents."""
+    if not settings.ANSWER_CACHE_ENABLED:
+        return None
+    normalized = normalize_query(query)
+    key = (collection, params, normalized)
+    current = vector_store.generation(collection)
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            if entry.generation == current and entry.expires_at > now:
+                _entries.move_to_end(key)
+                _stats["hits"] += 1
+                return entry.answer
+            del _entries[key]
+            _stats["stale"] += 1
+        if not _similarity_enabled():
+            _stats["misses"] += 1
+            return None
+        candidates = [
+            (k, e) for k, e in _entries.items()
+            if k[0] == collection and k[1] == params and e.vector is not None
+            and e.generation == current and e.expires_at > now
+        ]
+    if not candidates:
+        with _lock:
+            _stats["misses"] += 1
+        return None
+
+    # Same normalization as retrieval, so this vector is reused by retrieve() on a miss
+    vector = embeddings.embed_query(query)
+    threshold = float(settings.ANSWER_CACHE_SIMILARITY)
+    best_key, best_entry, best_score = None, None, threshold
+    for k, e in candidates:
+        score = _cosine(vector, e.vector or [])
+        if score >= best_score:
+            best_key, best_entry, best_score = k, e, score
+    with _lock:
+        if best_entry is None:
+            _stats["misses"] += 1
+            return None
+        _stats["similar_hits"] += 1
+        if best_key in _entries:
+            _entries.move_to_end(best_key)
+    logger.info(
+        "Answer cache similar hit | collection=%s | similarity=%.3f", collection, best_score
+    )
+    return best_entry.answer
+
+
+def store(
+    collection: str,
+    query: str,
+    answer: str,
+    *,
+    params: Tuple[Any, ...] = (),
+    generation: int,
+) -> None:
+    """Cache an answer computed against ``generation`` of the collection.
+
+    Callers read the generation before retrieval, so an answer computed while the
+    collection was being rewritten is stored as already stale.
+    """
+    if not settings.ANSWER_CACHE_ENABLED or not answer:
+        return
+    vector = embeddings.embed_query(query) if _similarity_enabled() else None
+    entry = _Entry(
+        answer=answer,
+        generation=generation,
+        expires_at=time.monotonic() + float(settings.ANSWER_CACHE_TTL_S),
+        vector=vector,
+    )
+    limit = max(1, int(settings.ANSWER_CACHE_MAX_ENTRIES))
+    with _lock:
+        key = (collection, params, normalize_query(query))
+        _entries[key] = entry
+        _entries.move_to_end(key)
+        while len(_entries) > limit:
+            _entries.popitem(last=False)
+
+
+def clear(collection: Optional[str] = None) -> int:
+    with _lock:
+        keys = [k for k in _entries if collection is None or k[0] == collection]
+        for k in keys:
+            del _entries[k]
+    return len(keys)
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        return {**_stats, "entries": len(_entries)}
+
+
+__all__ = ["clear", "lookup", "normalize_query", "stats", "store"]
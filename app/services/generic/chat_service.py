@@ -1,50 +1,54 @@
 # rag_core.py — Query via LangChain's Chroma (normalized scores + robust fallback)
 
+import asyncio
+import hashlib
+import json
+import re
 from textwrap import dedent
 from pathlib import Path
-from typing import List, Tuple, Dict, Any, Optional
+from typing import AsyncIterator, List, Tuple, Dict, Any, Optional
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 import warnings
 from app.utils.Logging.logger import logger
 from app.core.config import settings
+from app.utils.text.tokens import count_tokens, truncate_tokens
 
 # LangChain vector store + embeddings
 from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings
-from langchain_huggingface import HuggingFaceEmbeddings
-from app.utils.fileops.fileutils import hash_file
+from app.services.generic import answer_cache, embeddings, http_clients, insight_services, vector_store
 
 
 # -------------------------------
 # Build OpenAI-compatible client
 # -------------------------------
-def _get_client_and_model():
+def _client_config() -> Tuple[Dict[str, Any], str, str]:
+    """Return (client kwargs, model, provider) for the current environment."""
     app_env = settings.APP_ENV.lower()
     if app_env == "development":
-        client = OpenAI(
-            api_key=getattr(settings, "LOCAL_LLM_API_KEY", None),
-            base_url=getattr(settings, "LOCAL_LLM_BASE_URL", None),
-        )
-        model = settings.LOCAL_LLM_MODEL
-        try:
-            logger.info("Chat LLM configured | provider=local | model=%s", model)
-        except Exception:
-            pass
-        return client, model
-    else:
-        if not settings.OPENAI_API_KEY:
-            raise RuntimeError("OPENAI_API_KEY is required in production.")
-        client = OpenAI(api_key=settings.OPENAI_API_KEY)
-        model = settings.OPENAI_MODEL
-        try:
-            logger.info("Chat LLM configured | provider=openai | model=%s", model)
-        except Exception:
-            pass
-        return client, model
+        kwargs = {
+            "api_key": getattr(settings, "LOCAL_LLM_API_KEY", None),
+            "base_url": getattr(settings, "LOCAL_LLM_BASE_URL", None),
+        }
+        return kwargs, settings.LOCAL_LLM_MODEL, "local"
+    if not settings.OPENAI_API_KEY:
+        raise RuntimeError("OPENAI_API_KEY is required in production.")
+    return {"api_key": settings.OPENAI_API_KEY}, settings.OPENAI_MODEL, "openai"
+
+
+def _get_client_and_model():
+    kwargs, model, provider = _client_config()
+    client = OpenAI(**kwargs, http_client=http_clients.sync_client())
+    try:
+        logger.info("Chat LLM configured | provider=%s | model=%s", provider, model)
+    except Exception:
+        pass
+    return client, model
 
 
 client, CHAT_MODEL = _get_client_and_model()
+# Same endpoint for the async path, so awaiting requests never hold a worker thread
+aclient = AsyncOpenAI(**_client_config()[0], http_client=http_clients.async_client())
 
 # Suppress verbose warning that includes full Document.page_content in repr
 warnings.filterwarnings(
@@ -56,52 +60,23 @@ warnings.filterwarnings(
 # Shared threshold used by retrieval; answer() always calls LLM even when below threshold
 
 
-# -------------------------------
-# Embedding fn (must match ingestion)
-# -------------------------------
-def _get_embedding_fn():
-    """
-    IMPORTANT: Use the same embedding model as ingestion.
-    Defaults to text-embedding-3-small if OPENAI_EMBEDDING_MODEL not set.
-    """
-    app_env = settings.APP_ENV.lower()
-    if app_env == "development":
-        return HuggingFaceEmbeddings(model_name=settings.HUGGINGFACE_EMBEDDING_MODEL)
-    return OpenAIEmbeddings(api_key=settings.OPENAI_API_KEY, model=settings.OPENAI_EMBEDDING_MODEL)
-
-
 # -------------------------------
 # Vector store (LangChain-Chroma)
 # -------------------------------
 def _collection_name_from(file: str) -> str:
-    # Derive a unique, content-based name matching ingestion logic.
-    file_path = Path(file)
-    if not file_path.is_absolute():
-        base_candidate = Path(settings.BASE_DIR) / file
-        file_path = base_candidate if base_candidate.exists() else (Path(settings.UPLOAD_DIR) / file)
-    stem = file_path.stem
+    # Derive a unique, content-based name matching ingestion logic. The file hash comes
+    # from the fingerprint registry, so the upload is only re-read when its stat changes.
+    stem = Path(file).stem
     try:
-        h = hash_file(file_path)
-        return f"{stem}-{h[:12]}"
+        return insight_services.collection_name_for(file)
     except Exception:
         # Fallback to stem if file missing; avoids hard failure during testing
         return stem
 
 
 def _get_vectorstore(collection_name: str) -> Chroma:
-    persist_dir = Path(settings.VECTOR_STORE_DIR)
-    vs = Chroma(
-        collection_name=collection_name,
-        persist_directory=str(persist_dir),
-        embedding_function=_get_embedding_fn(),
-    )
-    logger.info("Chroma loaded | dir=%s | collection=%s", persist_dir, collection_name)
-    try:
-        cnt = vs._collection.count()  # type: ignore[attr-defined]
-        logger.info("Collection '%s' vector count: %s", collection_name, cnt)
-    except Exception as e:
-        logger.debug("Vector count unavailable: %s", e)
-    return vs
+    # Cached handle on the shared client; no per-call count on the read path
+    return vector_store.get_store(collection_name)
 
 
 # -------------------------------
@@ -133,6 +108,13 @@ def _normalize_scores(raw_scores: List[float]) -> List[float]:
     return raw_scores
 
 
+def _search_by_vector(vs: Chroma, query_vector: List[float], k: int):
+    """Vector search returning relevance scores, mirroring similarity_search_with_relevance_scores."""
+    relevance_fn = vs._select_relevance_score_fn()
+    pairs = vs.similarity_search_by_vector_with_relevance_scores(query_vector, k=k)
+    return [(doc, relevance_fn(distance)) for (doc, distance) in pairs]
+
+
 # -------------------------------
 # Retrieval (normalize + threshold + fallback)
 # -------------------------------
@@ -155,17 +137,28 @@ def retrieve(
     )
 
     vs = _get_vectorstore(collection)
-    pairs = vs.similarity_search_with_relevance_scores(query, k=k)  # [(Document, raw_score)]
-
-    docs = [doc for (doc, _s) in pairs]
-    raw_scores = [float(s) for (_d, s) in pairs]
-
+    # Query by vector so repeated queries (e.g. one job description across resumes) embed once
+    query_vector = embeddings.embed_query(query)
+    pairs = _search_by_vector(vs, query_vector, k)  # [(Document, raw_score)]
+    scored = [(doc.page_content or "", (doc.metadata or {}), float(s)) for (doc, s) in pairs]
+    return _select_hits(file, collection, scored, k, score_threshold, strict)
+
+
+def _select_hits(
+    file: str,
+    collection: str,
+    scored: List[Tuple[str, Dict[str, Any], float]],
+    k: int,
+    score_threshold: float,
+    strict: bool,
+) -> List[Tuple[str, Dict[str, Any], float]]:
+    """Normalize raw scores, sort best-first and apply the threshold (or the non-strict fallback)."""
     # Normalize to [0,1] regardless of backend semantics
-    norm_scores = _normalize_scores(raw_scores)
+    norm_scores = _normalize_scores([s for (_t, _m, s) in scored])
 
     results: List[Tuple[str, Dict[str, Any], float]] = []
-    for doc, ns in zip(docs, norm_scores):
-        results.append((doc.page_content or "", (doc.metadata or {}), ns))
+    for (text, meta, _s), ns in zip(scored, norm_scores):
+        results.append((text, meta, ns))
 
     # Best-first ordering
     results.sort(key=lambda x: x[2], reverse=True)
@@ -206,30 +199,146 @@ def retrieve(
         ],
     )
     return fallback
+
+
+def _search_by_vectors(vs: Chroma, query_vectors: List[List[float]], k: int):
+    """One Chroma query for several vectors; per vector ``[(text, metadata, relevance)]``."""
+    relevance_fn = vs._select_relevance_score_fn()
+    res = vs._collection.query(  # type: ignore[attr-defined]
+        query_embeddings=query_vectors,
+        n_results=k,
+        include=["documents", "metadatas", "distances"],
+    )
+    out = []
+    for docs, metas, dists in zip(res["documents"], res["metadatas"], res["distances"]):
+        out.append([
+            (text or "", meta or {}, float(relevance_fn(dist)))
+            for text, meta, dist in zip(docs, metas or [None] * len(docs), dists)
+        ])
+    return out
+
+
+def retrieve_many(
+    file: str,
+    queries: List[str],
+    k: int = 8,
+    score_threshold: float = 0.62,
+    strict: bool = True,
+) -> List[List[Tuple[str, Dict[str, Any], float]]]:
+    """``retrieve`` for several queries against one file, in order.
+
+    The collection is resolved once, all queries are embedded in one batch and
+    searched with a single Chroma query.
+    """
+    if not queries:
+        return []
+    collection = _collection_name_from(file)
+    logger.info(
+        "Retrieving batch | file=%s | collection=%s | queries=%d | k=%s | threshold=%.2f | strict=%s",
+        file, collection, len(queries), k, score_threshold, strict,
+    )
+    vs = _get_vectorstore(collection)
+    vectors = embeddings.embed_queries(queries)
+    return [
+        _select_hits(file, collection, scored, k, score_threshold, strict)
+        for scored in _search_by_vectors(vs, vectors, k)
+    ]
 
 
 # -------------------------------
-# Prompt building (context first + truncation guard)
+# Prompt building (context first, packed to a token budget)
 # -------------------------------
-def _shrink_blocks(hits, max_chars: int = 6000):
-    total = 0
-    kept = []
+# Longest suffix/prefix compared when stitching neighbouring chunks (splitter overlap is <=150 chars)
+_MAX_OVERLAP_CHARS = 400
+# Shorter matches are treated as coincidence, not splitter overlap
+_MIN_OVERLAP_CHARS = 20
+# A partially fitting block is only kept if at least this many tokens of it fit
+_MIN_TAIL_TOKENS = 100
+
+
+def _context_budget(model: str) -> int:
+    """Context token budget for the chat model (``CHAT_CONTEXT_TOKENS_BY_MODEL`` or the default)."""
+    return int(settings.CHAT_CONTEXT_TOKENS_BY_MODEL.get(model, settings.CHAT_CONTEXT_TOKENS))
+
+
+def _overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of ``left`` that is a prefix of ``right``."""
+    for n in range(min(len(left), len(right), _MAX_OVERLAP_CHARS), _MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:n]):
+            return n
+    return 0
+
+
+def _stitch(left: str, right: str) -> Optional[str]:
+    """Join two chunks of the same page if they overlap or one contains the other."""
+    if right in left:
+        return left
+    if left in right:
+        return right
+    n = _overlap(left, right)
+    if n:
+        return left + right[n:]
+    n = _overlap(right, left)
+    if n:
+        return right + left[n:]
+    return None
+
+
+def _merge_hits(hits) -> List[Tuple[str, Dict[str, Any], float]]:
+    """Merge overlapping chunks of the same source/page; a merged block keeps its best score."""
+    groups: Dict[Tuple[Any, ...], List[List[Any]]] = {}
+    order: List[Tuple[Any, ...]] = []
     for (doc, meta, score) in hits:
-        block = (doc or "").strip()
-        if not block:
+        text = (doc or "").strip()
+        if not text:
             continue
-        if total + len(block) > max_chars:
-            remain = max_chars - total
-            if remain > 400:  # keep a meaningful tail
-                kept.append((block[:remain], meta, score))
+        meta = meta if isinstance(meta, dict) else {}
+        key = (meta.get("source"), meta.get("page"), meta.get("row"))
+        if key not in groups:
+            groups[key] = []
+            order.append(key)
+        block = [text, meta, score]
+        # Keep stitching until the block no longer joins any existing block of this page
+        merged = True
+        while merged:
+            merged = False
+            for other in groups[key]:
+                joined = _stitch(other[0], block[0])
+                if joined is not None:
+                    groups[key].remove(other)
+                    block = [joined, block[1] if block[2] >= other[2] else other[1], max(block[2], other[2])]
+                    merged = True
+                    break
+        groups[key].append(block)
+    blocks = [(b[0], b[1], b[2]) for key in order for b in groups[key]]
+    # Stable sort: equal scores keep retrieval order, so citation numbers are reproducible
+    blocks.sort(key=lambda b: b[2], reverse=True)
+    return blocks
+
+
+def _pack_context(hits, model: str) -> List[Tuple[str, Dict[str, Any], float]]:
+    """Best-scoring merged blocks that fit the model's context token budget."""
+    budget = _context_budget(model)
+    used = 0
+    kept: List[Tuple[str, Dict[str, Any], float]] = []
+    for (text, meta, score) in _merge_hits(hits):
+        tokens = count_tokens(text, model)
+        if used + tokens > budget:
+            remain = budget - used
+            if remain >= _MIN_TAIL_TOKENS:
+                kept.append((truncate_tokens(text, remain, model), meta, score))
+                used += remain
             break
-        kept.append((block, meta, score))
-        total += len(block)
+        kept.append((text, meta, score))
+        used += tokens
+    logger.info(
+        "Context packed | hits=%d | blocks=%d | tokens=%d | budget=%d", len(hits), len(kept), used, budget
+    )
     return kept
 
 
 def build_prompt(query: str, hits) -> str:
-    hits = _shrink_blocks(hits, max_chars=6000)
+    hits = _pack_context(hits, CHAT_MODEL)
 
     if not hits:
         context = "No strong matches were retrieved for this query."
@@ -267,20 +376,77 @@ def build_prompt(query: str, hits) -> str:
 # -------------------------------
 # Orchestration
 # -------------------------------
-def answer(
+NO_CONTEXT_RESPONSE = "I don't know based on the provided context."
+
+
+History = Optional[List[Dict[str, str]]]
+
+
+def _messages(prompt: str, history: History = None) -> List[Dict[str, str]]:
+    # Earlier turns of the session come before the grounded prompt, so follow-ups resolve
+    return [
+        {"role": "system", "content": "You only use provided context. No outside knowledge."},
+        *(history or []),
+        {"role": "user", "content": prompt},
+    ]
+
+
+# A question leaning on an earlier turn: very short, opened by a connective, a
+# demonstrative or "what/how about", or using a third-person pronoun
+_FOLLOW_UP_MAX_WORDS = 3
+_FOLLOW_UP_LEADS = frozenset("and also but so then same this that these those".split())
+_FOLLOW_UP_PRONOUNS = frozenset("it its they them their he him his she her".split())
+
+
+def _follow_up_history(query: str, history: History) -> History:
+    """Session history when ``query`` looks like a follow-up, else None.
+
+    Standalone questions are retrieved, prompted and cached as if asked without a
+    session, so a topic switch is not pulled back to the old topic and repeated
+    questions share one cache entry.
+    """
+    if not history:
+        return None
+    words = re.findall(r"\w+", query.lower())
+    if len(words) <= _FOLLOW_UP_MAX_WORDS or words[0] in _FOLLOW_UP_LEADS:
+        return history
+    if words[1] == "about" and words[0] in ("what", "how"):
+        return history
+    return history if _FOLLOW_UP_PRONOUNS.intersection(words) else None
+
+
+def _retrieval_query(query: str, history: History) -> str:
+    """Follow-ups are often elliptical; retrieve with the previous user question as context."""
+    previous = next((m["content"] for m in reversed(history or []) if m.get("role") == "user"), "")
+    return f"{previous}\n{query}" if previous else query
+
+
+def _params(k: int, score_threshold: float, strict: bool, history: History) -> Tuple[Any, ...]:
+    # Answers to follow-ups depend on the history; only reuse them for the same history
+    digest = hashlib.sha1(json.dumps(history, sort_keys=True).encode("utf-8")).hexdigest() if history else ""
+    return (k, score_threshold, strict, digest)
+
+
+def _prepare_prompt(
     file: str,
     query: str,
-    k: int = 8,
-    score_threshold: float = 0.62,
-    strict: bool = True,
-) -> dict:
+    k: int,
+    score_threshold: float,
+    strict: bool,
+    history: History = None,
+) -> Optional[str]:
+    """Retrieve and build the grounded prompt; None when nothing relevant was found."""
     hits = retrieve(
         file,
-        query,
+        _retrieval_query(query, history),
         k=k,
         score_threshold=score_threshold,
         strict=strict,
     )
+    return _prompt_from_hits(file, query, hits)
+
+
+def _prompt_from_hits(file: str, query: str, hits) -> Optional[str]:
     # Avoid logging user prompt content; only log counts/metadata
     logger.info("Answering query | file=%s | hits_used=%d", file, len(hits))
 
@@ -290,34 +456,190 @@ def answer(
             "No relevant hits; skipping LLM and returning grounded 'I don't know' response | file=%s",
             file,
         )
-        return {"response": "I don't know based on the provided context."}
+        return None
 
     logger.info("Building prompt | file=%s | hits_used=%d", file, len(hits))
-    prompt = build_prompt(query, hits)
+    return build_prompt(query, hits)
+
+
+def _cached_answer(file: str, query: str, params: Tuple[Any, ...]) -> Tuple[str, int, Optional[str]]:
+    """Return (collection, generation, cached answer or None) for the query."""
+    collection = _collection_name_from(file)
+    # Read before retrieval: a write during answering makes the stored entry stale at once
+    generation = vector_store.generation(collection)
+    cached = answer_cache.lookup(collection, query, params=params)
+    if cached is not None:
+        logger.info("Answer cache hit | file=%s | collection=%s", file, collection)
+    return collection, generation, cached
 
+
+def answer(
+    file: str,
+    query: str,
+    k: int = 8,
+    score_threshold: float = 0.62,
+    strict: bool = True,
+    history: History = None,
+) -> dict:
+    """Grounded answer over the file; ``history`` holds earlier session turns (OpenAI message dicts).
+
+    The history is only used for apparent follow-ups (see ``_follow_up_history``).
+    """
+    history = _follow_up_history(query, history)
+    params = _params(k, score_threshold, strict, history)
+    collection, generation, cached = _cached_answer(file, query, params)
+    if cached is not None:
+        return {"response": cached}
+
+    prompt = _prepare_prompt(file, query, k, score_threshold, strict, history)
+    if prompt is None:
+        return {"response": NO_CONTEXT_RESPONSE}
+
+    provider = "local" if settings.APP_ENV.lower() == "development" else "openai"
+    logger.info("Calling LLM | provider=%s | model=%s | file=%s", provider, CHAT_MODEL, file)
     # Use the new endpoint if available; fallback for older client variants
     if hasattr(client, "chat_completions"):
-        provider = "local" if settings.APP_ENV.lower() == "development" else "openai"
-        logger.info("Calling LLM | provider=%s | model=%s | file=%s", provider, CHAT_MODEL, file)
-        chat = client.chat_completions.create(
-            model=CHAT_MODEL,
-            messages=[
-                {"role": "system", "content": "You only use provided context. No outside knowledge."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0,
-        )
+        chat = client.chat_completions.create(model=CHAT_MODEL, messages=_messages(prompt, history), temperature=0)
     else:
-        provider = "local" if settings.APP_ENV.lower() == "development" else "openai"
-        logger.info("Calling LLM | provider=%s | model=%s | file=%s", provider, CHAT_MODEL, file)
         chat = client.chat.completions.create(
-            model=CHAT_MODEL,
-            messages=[
-                {"role": "system", "content": "You only use provided context. No outside knowledge."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0,
+            model=CHAT_MODEL, messages=_messages(prompt, history), temperature=0
         )
 
     text = chat.choices[0].message.content
+    answer_cache.store(collection, query, text, params=params, generation=generation)
     return {"response": text}
+
+
+async def answer_async(
+    file: str,
+    query: str,
+    k: int = 8,
+    score_threshold: float = 0.62,
+    strict: bool = True,
+    history: History = None,
+) -> dict:
+    """Async variant of ``answer``: retrieval runs in a worker thread, the LLM call is awaited."""
+    history = _follow_up_history(query, history)
+    params = _params(k, score_threshold, strict, history)
+    collection, generation, cached = await asyncio.to_thread(_cached_answer, file, query, params)
+    if cached is not None:
+        return {"response": cached}
+
+    # Embedding + Chroma search are blocking; keep them off the event loop
+    prompt = await asyncio.to_thread(_prepare_prompt, file, query, k, score_threshold, strict, history)
+    if prompt is None:
+        return {"response": NO_CONTEXT_RESPONSE}
+
+    provider = "local" if settings.APP_ENV.lower() == "development" else "openai"
+    logger.info("Calling LLM (async) | provider=%s | model=%s | file=%s", provider, CHAT_MODEL, file)
+    chat = await aclient.chat.completions.create(
+        model=CHAT_MODEL, messages=_messages(prompt, history), temperature=0
+    )
+
+    text = chat.choices[0].message.content
+    await asyncio.to_thread(answer_cache.store, collection, query, text, params=params, generation=generation)
+    return {"response": text}
+
+
+async def answer_stream(
+    file: str,
+    query: str,
+    k: int = 8,
+    score_threshold: float = 0.62,
+    strict: bool = True,
+    history: History = None,
+) -> AsyncIterator[str]:
+    """Streaming variant of ``answer``: yields completion tokens as they arrive (``stream=True``)."""
+    history = _follow_up_history(query, history)
+    params = _params(k, score_threshold, strict, history)
+    collection, generation, cached = await asyncio.to_thread(_cached_answer, file, query, params)
+    if cached is not None:
+        yield cached
+        return
+
+    prompt = await asyncio.to_thread(_prepare_prompt, file, query, k, score_threshold, strict, history)
+    if prompt is None:
+        yield NO_CONTEXT_RESPONSE
+        return
+
+    provider = "local" if settings.APP_ENV.lower() == "development" else "openai"
+    logger.info("Calling LLM (stream) | provider=%s | model=%s | file=%s", provider, CHAT_MODEL, file)
+    stream = await aclient.chat.completions.create(
+        model=CHAT_MODEL, messages=_messages(prompt, history), temperature=0, stream=True
+    )
+    parts: List[str] = []
+    async for chunk in stream:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            parts.append(delta)
+            yield delta
+    await asyncio.to_thread(
+        answer_cache.store, collection, query, "".join(parts), params=params, generation=generation
+    )
+
+
+async def answer_batch(
+    file: str,
+    queries: List[str],
+    k: int = 8,
+    score_threshold: float = 0.62,
+    strict: bool = True,
+    concurrency: Optional[int] = None,
+) -> List[dict]:
+    """Answer several queries over one file; results are returned in query order.
+
+    Cached answers are served first; the rest share one embedding call and one
+    vector search (``retrieve_many``), and their completions run with at most
+    ``concurrency`` (default ``BATCH_LLM_CONCURRENCY``) requests in flight.
+    A failed completion is reported on its item as ``error``.
+    """
+    params = _params(k, score_threshold, strict, None)
+    collection = await asyncio.to_thread(_collection_name_from, file)
+    generation = vector_store.generation(collection)
+    results: List[Optional[dict]] = [None] * len(queries)
+
+    def _lookup_all() -> List[Optional[str]]:
+        return [answer_cache.lookup(collection, q, params=params) for q in queries]
+
+    for i, cached in enumerate(await asyncio.to_thread(_lookup_all)):
+        if cached is not None:
+            results[i] = {"response": cached}
+    pending = [i for i, r in enumerate(results) if r is None]
+    logger.info(
+        "Answering batch | file=%s | queries=%d | cached=%d", file, len(queries), len(queries) - len(pending)
+    )
+
+    if pending:
+        hits_per_query = await asyncio.to_thread(
+            retrieve_many, file, [queries[i] for i in pending], k, score_threshold, strict
+        )
+        semaphore = asyncio.Semaphore(max(1, int(concurrency or settings.BATCH_LLM_CONCURRENCY)))
+
+        async def _complete(i: int, hits) -> None:
+            prompt = _prompt_from_hits(file, queries[i], hits)
+            if prompt is None:
+                results[i] = {"response": NO_CONTEXT_RESPONSE}
+                return
+            try:
+                async with semaphore:
+                    chat = await aclient.chat.completions.create(
+                        model=CHAT_MODEL, messages=_messages(prompt), temperature=0
+                    )
+            except Exception as e:
+                logger.error("Batch completion failed | file=%s | index=%d | error=%s", file, i, e)
+                results[i] = {"response": None, "error": str(e)}
+                return
+            text = chat.choices[0].message.content
+            await asyncio.to_thread(
+                answer_cache.store, collection, queries[i], text, params=params, generation=generation
+            )
+            results[i] = {"response": text}
+
+        provider = "local" if settings.APP_ENV.lower() == "development" else "openai"
+        logger.info(
+            "Calling LLM (batch) | provider=%s | model=%s | file=%s | completions=%d",
+            provider, CHAT_MODEL, file, len(pending),
+        )
+        await asyncio.gather(*(_complete(i, hits) for i, hits in zip(pending, hits_per_query)))
+
+    return [r or {"response": NO_CONTEXT_RESPONSE} for r in results]
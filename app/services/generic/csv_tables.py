@@ -0,0 +1,316 @@
+"""Typed SQLite tables for uploaded CSV files.
+
+Each CSV revision is loaded (streamed, in batches) into its own table of
+``DB_DIR/csv_tables.sqlite3`` named after the file hash; ``csv_catalog`` maps
+the file name to its current table. Agents query a file through a read-only
+connection where the table is exposed as the view ``data`` and an authorizer
+rejects everything except SELECTs over that view.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import re
+import sqlite3
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.utils.Logging.logger import logger
+
+
+DB_PATH = Path(settings.DB_DIR) / "csv_tables.sqlite3"
+
+# Rows sampled from the top of the file to infer column types
+_SAMPLE_ROWS = 1000
+_INSERT_BATCH = 5000
+
+_schema_ready = False
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _connect() -> sqlite3.Connection:
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    return conn
+
+
+def _ensure_schema() -> None:
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _connect() as conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS csv_catalog (
+                file TEXT PRIMARY KEY,
+                file_hash TEXT NOT NULL,
+                table_name TEXT NOT NULL,
+                columns TEXT NOT NULL,            -- JSON [{name, source, type}, ...]
+                row_count INTEGER NOT NULL,
+                created_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.commit()
+    _schema_ready = True
+
+
+def table_name_for(file_hash: str) -> str:
+    return f"csv_{file_hash[:16].lower()}"
+
+
+def _column_names(header: List[str]) -> List[str]:
+    """SQL-friendly, unique column names (lowercase snake case) for a CSV header."""
+    names: List[str] = []
+    for idx, raw in enumerate(header):
+        name = re.sub(r"[^0-9a-zA-Z]+", "_", (raw or "").strip()).strip("_").lower()
+        if not name:
+            name = f"col_{idx + 1}"
+        if name[0].isdigit():
+            name = f"c_{name}"
+        base, n = name, 2
+        while name in names:
+            name = f"{base}_{n}"
+            n += 1
+        names.append(name)
+    return names
+
+
+def _infer_type(values: Iterable[str]) -> str:
+    kind = "INTEGER"
+    seen = False
+    for value in values:
+        value = value.strip()
+        if not value:
+            continue
+        seen = True
+        if kind == "INTEGER":
+            try:
+                int(value)
+                continue
+            except ValueError:
+                kind = "REAL"
+        try:
+            float(value)
+        except ValueError:
+            return "TEXT"
+    return kind if seen else "TEXT"
+
+
+def _convert(value: Optional[str], kind: str) -> Any:
+    if value is None:
+        return None
+    value = value.strip()
+    if value == "":
+        return None
+    try:
+        if kind == "INTEGER":
+            return int(value)
+        if kind == "REAL":
+            return float(value)
+    except ValueError:
+        # Type was inferred from a sample; keep late outliers as text
+        pass
+    return value
+
+
+def get_table(file: str) -> Optional[Dict[str, Any]]:
+    _ensure_schema()
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT file, file_hash, table_name, columns, row_count, created_at FROM csv_catalog WHERE file=?",
+            (file,),
+        ).fetchone()
+    if not row:
+        return None
+    return {
+        "file": row[0],
+        "file_hash": row[1],
+        "table": row[2],
+        "columns": json.loads(row[3] or "[]"),
+        "row_count": row[4],
+        "created_at": row[5],
+    }
+
+
+def _point_catalog(
+    file: str, file_hash: str, table: str, columns: str, row_count: int, *, previous: Optional[str]
+) -> None:
+    with _connect() as conn:
+        conn.execute(
+            """
+            INSERT INTO csv_catalog(file, file_hash, table_name, columns, row_count, created_at)
+            VALUES(?, ?, ?, ?, ?, ?)
+            ON CONFLICT(file) DO UPDATE SET
+                file_hash=excluded.file_hash,
+                table_name=excluded.table_name,
+                columns=excluded.columns,
+                row_count=excluded.row_count,
+                created_at=excluded.created_at
+            """,
+            (file, file_hash, table, columns, row_count, _now()),
+        )
+        if previous and previous != table:
+            # Drop the superseded revision unless another file name still points at it
+            refs = conn.execute("SELECT COUNT(*) FROM csv_catalog WHERE table_name=?", (previous,)).fetchone()[0]
+            if not refs:
+                conn.execute(f'DROP TABLE IF EXISTS "{previous}"')
+        conn.commit()
+
+
+def load_csv(file_location: str, *, file: str, file_hash: str) -> Dict[str, Any]:
+    """Load the CSV into a typed table for ``file_hash`` and point ``file`` at it.
+
+    Idempotent per hash. Rows are streamed in batches, so memory is bounded by the
+    type-inference sample and one insert batch. Safe to run in a worker process.
+    """
+    _ensure_schema()
+    table = table_name_for(file_hash)
+    current = get_table(file)
+    if current and current["table"] == table:
+        return current
+    with _connect() as conn:
+        # Same bytes already loaded under another file name: share that table
+        twin = conn.execute(
+            "SELECT columns, row_count FROM csv_catalog WHERE table_name=? LIMIT 1", (table,)
+        ).fetchone()
+    if twin:
+        _point_catalog(file, file_hash, table, twin[0], twin[1], previous=current["table"] if current else None)
+        return get_table(file) or {}
+
+    started = time.perf_counter()
+    staging = f"{table}_loading"
+    with open(file_location, newline="") as f, _connect() as conn:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        names = _column_names(header)
+        sample: List[List[str]] = []
+        for row in reader:
+            sample.append(row)
+            if len(sample) >= _SAMPLE_ROWS:
+                break
+        types = [_infer_type(r[i] if i < len(r) else "" for r in sample) for i in range(len(names))]
+
+        conn.execute(f'DROP TABLE IF EXISTS "{staging}"')
+        ddl = ", ".join(f'"{n}" {t}' for n, t in zip(names, types))
+        conn.execute(f'CREATE TABLE "{staging}" ({ddl})')
+        insert = f'INSERT INTO "{staging}" VALUES ({", ".join("?" for _ in names)})'
+
+        def _rows(rows: Iterable[List[str]]) -> Iterable[Tuple[Any, ...]]:
+            for r in rows:
+                yield tuple(_convert(r[i] if i < len(r) else None, t) for i, t in enumerate(types))
+
+        count = len(sample)
+        conn.executemany(insert, _rows(sample))
+        del sample
+        batch: List[List[str]] = []
+        for row in reader:
+            batch.append(row)
+            if len(batch) >= _INSERT_BATCH:
+                conn.executemany(insert, _rows(batch))
+                count += len(batch)
+                batch = []
+        conn.executemany(insert, _rows(batch))
+        count += len(batch)
+
+        columns = [{"name": n, "source": s, "type": t} for n, s, t in zip(names, header, types)]
+        conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+        conn.execute(f'ALTER TABLE "{staging}" RENAME TO "{table}"')
+        conn.commit()
+    _point_catalog(
+        file, file_hash, table, json.dumps(columns), count, previous=current["table"] if current else None
+    )
+
+    logger.info(
+        "CSV table loaded | file=%s | table=%s | rows=%d | columns=%d | elapsed_ms=%d",
+        file, table, count, len(names), int((time.perf_counter() - started) * 1000),
+    )
+    return get_table(file) or {}
+
+
+def ensure_table(file: str) -> Dict[str, Any]:
+    """Return the catalog entry for the file's current revision, loading it if missing."""
+    # Imported lazily: insight_services pulls in LangChain loaders, which load_csv workers never need
+    from app.services.generic import fingerprints, insight_services
+
+    file_location = insight_services._resolve_path(file)
+    if Path(file_location).suffix.lower() != ".csv":
+        raise ValueError(f"Not a CSV file: {file}")
+    file_hash = fingerprints.file_hash(file_location, file=Path(file).name)
+    current = get_table(file)
+    if current and current["file_hash"] == file_hash:
+        return current
+    return load_csv(file_location, file=file, file_hash=file_hash)
+
+
+def describe(file: str, *, sample_rows: int = 3) -> Dict[str, Any]:
+    """Schema, row count and a few sample rows of the file's ``data`` view."""
+    info = ensure_table(file)
+    sample = query(file, f"SELECT * FROM data LIMIT {max(0, int(sample_rows))}")
+    return {
+        "file": file,
+        "view": "data",
+        "row_count": info["row_count"],
+        "columns": info["columns"],
+        "sample": sample["rows"],
+    }
+
+
+def query(file: str, sql: str, *, max_rows: Optional[int] = None) -> Dict[str, Any]:
+    """Run a read-only SELECT against the file's table, exposed as the view ``data``.
+
+    Returns ``{columns, rows, row_count, truncated, elapsed_ms}``; at most
+    ``CSV_QUERY_MAX_ROWS`` rows are returned and the query is aborted after
+    ``CSV_QUERY_TIMEOUT_S``.
+    """
+    info = ensure_table(file)
+    table = info["table"]
+    limit = int(max_rows or settings.CSV_QUERY_MAX_ROWS)
+    statement = (sql or "").strip().rstrip(";")
+    if not statement:
+        raise ValueError("Empty SQL query")
+
+    conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+    try:
+        conn.execute(f'CREATE TEMP VIEW data AS SELECT * FROM main."{table}"')
+
+        def _authorize(action: int, arg1: Any, arg2: Any, db: Any, source: Any) -> int:
+            if action in (sqlite3.SQLITE_SELECT, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE):
+                return sqlite3.SQLITE_OK
+            if action == sqlite3.SQLITE_READ and (arg1 in ("data", table) or db is None):
+                # db is None for CTE/subquery columns, which only ever derive from ``data``
+                return sqlite3.SQLITE_OK
+            return sqlite3.SQLITE_DENY
+
+        conn.set_authorizer(_authorize)
+        deadline = time.monotonic() + float(settings.CSV_QUERY_TIMEOUT_S)
+        # Non-zero return aborts the statement with "interrupted"
+        conn.set_progress_handler(lambda: int(time.monotonic() > deadline), 10_000)
+
+        started = time.perf_counter()
+        cur = conn.execute(statement)
+        rows = cur.fetchmany(limit + 1)
+        columns = [d[0] for d in (cur.description or [])]
+    finally:
+        conn.close()
+
+    truncated = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "columns": columns,
+        "rows": [list(r) for r in rows],
+        "row_count": len(rows),
+        "truncated": truncated,
+        "elapsed_ms": int((time.perf_counter() - started) * 1000),
+    }
+
+
+__all__ = ["describe", "ensure_table", "get_table", "load_csv", "query", "table_name_for"]
@@ -0,0 +1,228 @@
+"""Persistent, content-addressed cache of document embeddings.
+
+Vectors are keyed by (embedding model, sha256 of the chunk text) and stored in a
+dedicated SQLite file under ``settings.DB_DIR``. ``CachedEmbeddings`` wraps any
+LangChain ``Embeddings`` so that ingestion only calls the backend for misses.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from app.core.config import settings
+from app.utils.Logging.logger import logger
+
+
+DB_PATH = Path(settings.DB_DIR) / "embedding_cache.sqlite3"
+
+# Evict down to this fraction of the configured maximum when the bound is exceeded
+_EVICT_TO = 0.9
+# Re-check the entry count after this many inserts instead of on every write
+_EVICT_CHECK_EVERY = 1000
+
+_LOCK = threading.Lock()
+_schema_ready = False
+_inserts_since_check = 0
+_stats = {"hits": 0, "misses": 0, "evicted": 0}
+
+
+def _connect() -> sqlite3.Connection:
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    return conn
+
+
+def _ensure_schema() -> None:
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _connect() as conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        conn.commit()
+    _schema_ready = True
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def _pack(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> List[float]:
+    arr = array("f")
+    arr.frombytes(blob)
+    return arr.tolist()
+
+
+def get_many(model: str, hashes: List[str]) -> Dict[str, List[float]]:
+    """Return cached vectors for the given text hashes and refresh their recency."""
+    if not hashes:
+        return {}
+    _ensure_schema()
+    found: Dict[str, List[float]] = {}
+    now = time.time()
+    unique = list(dict.fromkeys(hashes))
+    with _connect() as conn:
+        # Stay well below SQLite's bound-parameter limit
+        for i in range(0, len(unique), 500):
+            part = unique[i : i + 500]
+            marks = ",".join("?" for _ in part)
+            cur = conn.execute(
+                f"SELECT text_hash, vector FROM embeddings WHERE model=? AND text_hash IN ({marks})",
+                (model, *part),
+            )
+            for h, blob in cur.fetchall():
+                found[h] = _unpack(blob)
+        if found:
+            conn.executemany(
+                "UPDATE embeddings SET last_used=? WHERE model=? AND text_hash=?",
+                [(now, model, h) for h in found],
+            )
+        conn.commit()
+    return found
+
+
+def put_many(model: str, items: Dict[str, List[float]]) -> None:
+    global _inserts_since_check
+    if not items:
+        return
+    _ensure_schema()
+    now = time.time()
+    with _connect() as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_used) VALUES (?, ?, ?, ?)",
+            [(model, h, _pack(v), now) for h, v in items.items()],
+        )
+        conn.commit()
+    with _LOCK:
+        _inserts_since_check += len(items)
+        due = _inserts_since_check >= _EVICT_CHECK_EVERY
+        if due:
+            _inserts_since_check = 0
+    if due:
+        evict()
+
+
+def evict(max_entries: Optional[int] = None) -> int:
+    """Drop least-recently-used entries once the cache exceeds its size bound."""
+    limit = int(max_entries if max_entries is not None else settings.EMBEDDING_CACHE_MAX_ENTRIES)
+    if limit <= 0:
+        return 0
+    _ensure_schema()
+    with _connect() as conn:
+        total = int(conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0])
+        if total <= limit:
+            return 0
+        drop = total - int(limit * _EVICT_TO)
+        conn.execute(
+            """
+            DELETE FROM embeddings WHERE rowid IN (
+                SELECT rowid FROM embeddings ORDER BY last_used ASC LIMIT ?
+            )
+            """,
+            (drop,),
+        )
+        conn.commit()
+    with _LOCK:
+        _stats["evicted"] += drop
+    logger.info("Embedding cache evicted | dropped=%d | limit=%d", drop, limit)
+    return drop
+
+
+def stats() -> Dict[str, Any]:
+    """Return hit/miss counters for this process and the persisted entry count."""
+    try:
+        _ensure_schema()
+        with _connect() as conn:
+            entries = int(conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0])
+    except Exception:
+        entries = None
+    with _LOCK:
+        hits, misses, evicted = _stats["hits"], _stats["misses"], _stats["evicted"]
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        "evicted": evicted,
+        "entries": entries,
+        "max_entries": settings.EMBEDDING_CACHE_MAX_ENTRIES,
+    }
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves document vectors from the persistent cache."""
+
+    def __init__(self, backend: Embeddings, model: str):
+        self.backend = backend
+        self.model = model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        hashes = [text_hash(t) for t in texts]
+        try:
+            cached = get_many(self.model, hashes)
+        except Exception as e:
+            logger.warning("Embedding cache lookup failed; embedding all texts | error=%s", e)
+            cached = {}
+
+        # Embed each distinct missing text once, even if it repeats within the batch
+        missing: Dict[str, str] = {}
+        for h, t in zip(hashes, texts):
+            if h not in cached and h not in missing:
+                missing[h] = t
+        fresh: Dict[str, List[float]] = {}
+        if missing:
+            vectors = self.backend.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            try:
+                put_many(self.model, fresh)
+            except Exception as e:
+                logger.warning("Embedding cache write failed | error=%s", e)
+
+        hits = len(texts) - len(missing)
+        with _LOCK:
+            _stats["hits"] += hits
+            _stats["misses"] += len(missing)
+        logger.info(
+            "Embedding cache | model=%s | texts=%d | hits=%d | misses=%d",
+            self.model,
+            len(texts),
+            hits,
+            len(missing),
+        )
+        return [cached[h] if h in cached else fresh[h] for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.backend.embed_query(text)
+
+
+__all__ = [
+    "CachedEmbeddings",
+    "evict",
+    "stats",
+    "text_hash",
+]
@@ -0,0 +1,182 @@
+"""Process-wide embedding registry shared by ingestion and retrieval.
+
+Embedding backends are expensive to construct (HuggingFace loads model weights,
+OpenAI builds an HTTP client), so every service obtains them from here instead
+of instantiating its own. Instances are keyed by (backend, model).
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from app.core.config import settings
+from app.services.generic.embedding_cache import CachedEmbeddings
+from app.utils.Logging.logger import logger
+
+
+_REGISTRY: Dict[Tuple[str, str], Embeddings] = {}
+_CACHED: Dict[Tuple[str, str], Embeddings] = {}
+
+# Bounded LRU of query vectors keyed by (model, normalized query)
+_QUERY_CACHE: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+_QUERY_LOCK = threading.Lock()
+_LOCK = threading.Lock()
+
+
+def default_backend() -> Tuple[str, str]:
+    """Return the (backend, model) pair configured for the current environment."""
+    if (settings.APP_ENV or "").lower() == "development":
+        return "huggingface", settings.HUGGINGFACE_EMBEDDING_MODEL
+    return "openai", settings.OPENAI_EMBEDDING_MODEL
+
+
+def _build(backend: str, model: str) -> Embeddings:
+    if backend == "huggingface":
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        return HuggingFaceEmbeddings(model_name=model)
+    if backend == "openai":
+        from langchain_openai import OpenAIEmbeddings
+
+        from app.services.generic import http_clients
+
+        return OpenAIEmbeddings(
+            api_key=settings.OPENAI_API_KEY,
+            model=model,
+            http_client=http_clients.sync_client(),
+            http_async_client=http_clients.async_client(),
+        )
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+
+def get_embeddings(backend: Optional[str] = None, model: Optional[str] = None) -> Embeddings:
+    """Return the shared embedding instance for (backend, model), creating it once."""
+    default_name, default_model = default_backend()
+    name = (backend or default_name).lower()
+    key = (name, model or (default_model if name == default_name else ""))
+    if not key[1]:
+        raise ValueError(f"Embedding model required for backend: {name}")
+
+    emb = _REGISTRY.get(key)
+    if emb is not None:
+        return emb
+    with _LOCK:
+        emb = _REGISTRY.get(key)
+        if emb is None:
+            emb = _build(*key)
+            _REGISTRY[key] = emb
+            logger.info("Embeddings registered | provider=%s | model=%s", key[0], key[1])
+    return emb
+
+
+def model_key() -> str:
+    """Stable identifier of the default embedding model, used to namespace caches."""
+    backend, model = default_backend()
+    return f"{backend}:{model}"
+
+
+def get_ingest_embeddings() -> Embeddings:
+    """Return the default backend fronted by the persistent chunk-embedding cache.
+
+    Use this for embedding document chunks; queries go through ``get_embeddings``.
+    """
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return get_embeddings()
+    key = default_backend()
+    emb = _CACHED.get(key)
+    if emb is not None:
+        return emb
+    backend = get_embeddings(*key)
+    with _LOCK:
+        emb = _CACHED.get(key)
+        if emb is None:
+            emb = CachedEmbeddings(backend, model_key())
+            _CACHED[key] = emb
+    return emb
+
+
+def _normalize_query(text: str) -> str:
+    return " ".join((text or "").split())
+
+
+def embed_query(text: str) -> List[float]:
+    """Embed a retrieval query once per process; repeats are served from the LRU."""
+    normalized = _normalize_query(text)
+    key = (model_key(), normalized)
+    with _QUERY_LOCK:
+        vector = _QUERY_CACHE.get(key)
+        if vector is not None:
+            _QUERY_CACHE.move_to_end(key)
+            return vector
+
+    vector = get_embeddings().embed_query(normalized)
+
+    limit = int(settings.QUERY_EMBEDDING_CACHE_SIZE)
+    if limit > 0:
+        with _QUERY_LOCK:
+            _QUERY_CACHE[key] = vector
+            _QUERY_CACHE.move_to_end(key)
+            while len(_QUERY_CACHE) > limit:
+                _QUERY_CACHE.popitem(last=False)
+    return vector
+
+
+def embed_queries(texts: List[str]) -> List[List[float]]:
+    """Embed several retrieval queries with one backend call; LRU hits are not re-embedded.
+
+    Misses go through ``embed_documents``, which matches ``embed_query`` for the
+    OpenAI and sentence-transformers backends used here.
+    """
+    normalized = [_normalize_query(t) for t in texts]
+    mk = model_key()
+    vectors: List[Optional[List[float]]] = []
+    with _QUERY_LOCK:
+        for text in normalized:
+            vector = _QUERY_CACHE.get((mk, text))
+            if vector is not None:
+                _QUERY_CACHE.move_to_end((mk, text))
+            vectors.append(vector)
+
+    missing = list(dict.fromkeys(t for t, v in zip(normalized, vectors) if v is None))
+    if missing:
+        computed = dict(zip(missing, get_embeddings().embed_documents(missing)))
+        vectors = [v if v is not None else computed[t] for t, v in zip(normalized, vectors)]
+        limit = int(settings.QUERY_EMBEDDING_CACHE_SIZE)
+        if limit > 0:
+            with _QUERY_LOCK:
+                for text, vector in computed.items():
+                    _QUERY_CACHE[(mk, text)] = vector
+                    _QUERY_CACHE.move_to_end((mk, text))
+                while len(_QUERY_CACHE) > limit:
+                    _QUERY_CACHE.popitem(last=False)
+    return vectors  # type: ignore[return-value]
+
+
+def warmup() -> None:
+    """Build the default backend eagerly so the first request does not pay for it."""
+    if not settings.EMBEDDINGS_WARMUP:
+        return
+    backend, model = default_backend()
+    try:
+        emb = get_embeddings(backend, model)
+        if backend == "huggingface":
+            # Force weight loading and a first forward pass; free for local models
+            emb.embed_query("warmup")
+        logger.info("Embeddings warmed up | provider=%s | model=%s", backend, model)
+    except Exception as e:
+        logger.warning("Embeddings warmup failed | provider=%s | model=%s | error=%s", backend, model, e)
+
+
+__all__ = [
+    "default_backend",
+    "embed_queries",
+    "embed_query",
+    "get_embeddings",
+    "get_ingest_embeddings",
+    "model_key",
+    "warmup",
+]
@@ -0,0 +1,85 @@
+"""File fingerprint cache: SHA-256 of uploads keyed by (path, size, mtime_ns).
+
+Hashing a whole upload on every retrieval is O(file size) of disk I/O. The
+hash only needs recomputing when the file's stat signature changes, so it is
+memoized in-process and persisted on the ``documents`` rows in ``ingestion_db``.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from app.services.generic import ingestion_db
+from app.utils.fileops.fileutils import hash_file
+from app.utils.Logging.logger import logger
+
+
+_MEMO_MAX = 4096
+
+_memo: Dict[Tuple[str, int, int], str] = {}
+_lock = threading.Lock()
+
+
+def _signature(path: Path) -> Tuple[str, int, int]:
+    st = os.stat(path)
+    return str(path), int(st.st_size), int(st.st_mtime_ns)
+
+
+def _remember(key: Tuple[str, int, int], digest: str) -> None:
+    with _lock:
+        if len(_memo) >= _MEMO_MAX:
+            _memo.clear()
+        _memo[key] = digest
+
+
+def file_hash(path: str | Path, *, file: Optional[str] = None) -> str:
+    """Return the SHA-256 of ``path``, re-reading the file only if its stat changed.
+
+    ``file`` is the registry name (as stored in ``documents.file``); it defaults
+    to the path's basename.
+    """
+    p = Path(path)
+    key = _signature(p)
+    with _lock:
+        digest = _memo.get(key)
+    if digest:
+        return digest
+
+    name = file or p.name
+    _, size, mtime_ns = key
+    try:
+        digest = ingestion_db.get_file_fingerprint(name, size=size, mtime_ns=mtime_ns)
+    except Exception as e:
+        logger.debug("Fingerprint lookup failed | file=%s | error=%s", name, e)
+        digest = None
+
+    if not digest:
+        digest = hash_file(p)
+        logger.info("File hashed | file=%s | size=%d", name, size)
+        record(p, digest, file=name, signature=key)
+    else:
+        _remember(key, digest)
+    return digest
+
+
+def record(
+    path: str | Path,
+    digest: str,
+    *,
+    file: Optional[str] = None,
+    signature: Optional[Tuple[str, int, int]] = None,
+) -> None:
+    """Seed the cache with a hash computed elsewhere (e.g. while streaming an upload)."""
+    p = Path(path)
+    key = signature or _signature(p)
+    _remember(key, digest)
+    try:
+        ingestion_db.set_file_fingerprint(file or p.name, size=key[1], mtime_ns=key[2], file_hash=digest)
+    except Exception as e:
+        logger.debug("Fingerprint persist failed | file=%s | error=%s", file or p.name, e)
+
+
+__all__ = ["file_hash", "record"]
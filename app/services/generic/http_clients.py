@@ -0,0 +1,148 @@
+"""Shared pooled HTTP transport for LLM and embedding clients.
+
+The OpenAI chat clients, every ``ChatOpenAI`` and ``OpenAIEmbeddings`` receive
+these httpx clients, so keep-alive connections (and their TLS sessions) are
+reused across services instead of each SDK object owning a private pool.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.utils.Logging.logger import logger
+
+
+_sync: Optional[httpx.Client] = None
+_async: Optional[httpx.AsyncClient] = None
+_lock = threading.Lock()
+_counters = {
+    "sync": {"requests": 0, "responses": 0},
+    "async": {"requests": 0, "responses": 0},
+}
+
+
+def _http2_enabled() -> bool:
+    if not settings.HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401  (httpx[http2] extra)
+    except ImportError:
+        logger.warning("HTTP2_ENABLED is set but the 'h2' package is missing; using HTTP/1.1")
+        return False
+    return True
+
+
+def _options() -> Dict[str, Any]:
+    return {
+        "limits": httpx.Limits(
+            max_connections=int(settings.HTTP_MAX_CONNECTIONS),
+            max_keepalive_connections=int(settings.HTTP_MAX_KEEPALIVE_CONNECTIONS),
+            keepalive_expiry=float(settings.HTTP_KEEPALIVE_EXPIRY_S),
+        ),
+        "timeout": httpx.Timeout(
+            float(settings.HTTP_TIMEOUT_S),
+            connect=float(settings.HTTP_CONNECT_TIMEOUT_S),
+        ),
+        "http2": _http2_enabled(),
+    }
+
+
+def _count(kind: str, field: str) -> None:
+    with _lock:
+        _counters[kind][field] += 1
+
+
+def sync_client() -> httpx.Client:
+    global _sync
+    if _sync is None:
+        with _lock:
+            if _sync is None:
+                opts = _options()
+                _sync = httpx.Client(
+                    **opts,
+                    event_hooks={
+                        "request": [lambda request: _count("sync", "requests")],
+                        "response": [lambda response: _count("sync", "responses")],
+                    },
+                )
+                logger.info("HTTP client created | kind=sync | http2=%s", opts["http2"])
+    return _sync
+
+
+def async_client() -> httpx.AsyncClient:
+    global _async
+    if _async is None:
+
+        async def _on_request(request: httpx.Request) -> None:
+            _count("async", "requests")
+
+        async def _on_response(response: httpx.Response) -> None:
+            _count("async", "responses")
+
+        with _lock:
+            if _async is None:
+                opts = _options()
+                _async = httpx.AsyncClient(
+                    **opts,
+                    event_hooks={"request": [_on_request], "response": [_on_response]},
+                )
+                logger.info("HTTP client created | kind=async | http2=%s", opts["http2"])
+    return _async
+
+
+def _pool_stats(client: Any) -> Dict[str, Any]:
+    # httpcore's pool is not public API; report what this version exposes
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []) or [])
+    idle = 0
+    http2 = 0
+    for conn in connections:
+        try:
+            if conn.is_idle():
+                idle += 1
+            if "HTTP/2" in conn.info():
+                http2 += 1
+        except Exception:
+            continue
+    return {"connections": len(connections), "idle": idle, "active": len(connections) - idle, "http2": http2}
+
+
+def stats() -> Dict[str, Any]:
+    out: Dict[str, Any] = {
+        "config": {
+            "max_connections": int(settings.HTTP_MAX_CONNECTIONS),
+            "max_keepalive_connections": int(settings.HTTP_MAX_KEEPALIVE_CONNECTIONS),
+            "keepalive_expiry_s": float(settings.HTTP_KEEPALIVE_EXPIRY_S),
+            "timeout_s": float(settings.HTTP_TIMEOUT_S),
+            "http2": bool(settings.HTTP2_ENABLED),
+        }
+    }
+    for kind, client in (("sync", _sync), ("async", _async)):
+        with _lock:
+            counters = dict(_counters[kind])
+        # Requests that fail before a response (connect errors, timeouts) never fire the
+        # response hook, so counter differences are not in-flight requests; see pool "active"
+        entry: Dict[str, Any] = {"created": client is not None, **counters}
+        if client is not None:
+            entry.update(_pool_stats(client))
+        out[kind] = entry
+    return out
+
+
+async def aclose() -> None:
+    """Close both clients at app shutdown."""
+    global _sync, _async
+    with _lock:
+        sync, async_ = _sync, _async
+        _sync, _async = None, None
+    if sync is not None:
+        sync.close()
+    if async_ is not None:
+        await async_.aclose()
+
+
+__all__ = ["aclose", "async_client", "stats", "sync_client"]
@@ -20,7 +20,13 @@ def _connect() -> sqlite3.Connection:
     return conn
 
 
+_schema_ready = False
+
+
 def _ensure_schema() -> None:
+    global _schema_ready
+    if _schema_ready:
+        return
     with _connect() as conn:
         conn.execute(
             """
@@ -37,12 +43,20 @@ def _ensure_schema() -> None:
             )
             """
         )
-        try:
-            conn.execute("ALTER TABLE documents ADD COLUMN keywords TEXT")
-        except sqlite3.OperationalError:
-            # Column already exists
-            pass
+        for column in (
+            "keywords TEXT",
+            # File fingerprint: lets callers skip re-hashing while (size, mtime_ns) is unchanged
+            "file_size INTEGER",
+            "file_mtime_ns INTEGER",
+            "file_hash TEXT",
+        ):
+            try:
+                conn.execute(f"ALTER TABLE documents ADD COLUMN {column}")
+            except sqlite3.OperationalError:
+                # Column already exists
+                pass
         conn.commit()
+    _schema_ready = True
 
 
 def _ensure_search_schema() -> None:
@@ -175,6 +189,66 @@ def list_documents(agent: str) -> List[Dict[str, Any]]:
     return out
 
 
+def get_document(agent: str, file: str) -> Optional[Dict[str, Any]]:
+    """Return the registry row for (agent, file), or None."""
+    agent_name = (agent or "").strip().lower()
+    for row in list_documents(agent_name):
+        if row.get("file") == file:
+            return row
+    return None
+
+
+def count_collection_references(vector_collection: str) -> int:
+    """Number of registry rows (any agent) pointing at ``vector_collection``."""
+    _ensure_schema()
+    with _connect() as conn:
+        cur = conn.execute(
+            "SELECT COUNT(*) FROM documents WHERE vector_collection=?",
+            (vector_collection,),
+        )
+        return int(cur.fetchone()[0])
+
+
+def list_vector_collections() -> List[str]:
+    """Distinct collection names referenced by any registry row (all agents)."""
+    _ensure_schema()
+    with _connect() as conn:
+        cur = conn.execute(
+            "SELECT DISTINCT vector_collection FROM documents WHERE IFNULL(vector_collection, '') != ''"
+        )
+        return [r[0] for r in cur.fetchall()]
+
+
+def get_file_fingerprint(file: str, *, size: int, mtime_ns: int) -> Optional[str]:
+    """Return the recorded SHA-256 for ``file`` if its stat signature is unchanged."""
+    _ensure_schema()
+    with _connect() as conn:
+        cur = conn.execute(
+            """
+            SELECT file_hash FROM documents
+            WHERE file=? AND file_size=? AND file_mtime_ns=? AND file_hash IS NOT NULL
+            LIMIT 1
+            """,
+            (file, int(size), int(mtime_ns)),
+        )
+        row = cur.fetchone()
+    return row[0] if row else None
+
+
+def set_file_fingerprint(file: str, *, size: int, mtime_ns: int, file_hash: str) -> None:
+    """Record the fingerprint on every registry row for ``file`` (all agents)."""
+    _ensure_schema()
+    with _connect() as conn:
+        conn.execute(
+            """
+            UPDATE documents SET file_size=?, file_mtime_ns=?, file_hash=?
+            WHERE file=?
+            """,
+            (int(size), int(mtime_ns), file_hash, file),
+        )
+        conn.commit()
+
+
 def upsert_doc_keywords(
     *,
     agent: str,
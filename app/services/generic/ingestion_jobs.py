@@ -0,0 +1,581 @@
+"""Durable ingestion job queue with a process worker pool.
+
+Jobs are rows in the ``ingestion_jobs`` table of the ingestion SQLite DB, so they
+survive restarts and can be inspected via ``GET /agent/upload/jobs/{id}``.
+
+Heavy stages (load, split, embed) run in worker processes and stream embedded
+batches back over a bounded queue; CSVs are also loaded into their SQL table
+(``csv_tables``) by a second worker in parallel. The API process performs the Chroma writes,
+registry update and enrichment, since it owns the only Chroma client (see
+``vector_store``). Designed for a single API process per storage root: jobs
+left ``running`` by a previous process are re-queued on ``start()``.
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import queue as queue_mod
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.generic import (
+    csv_tables,
+    embeddings,
+    fingerprints,
+    ingestion_db,
+    insight_services,
+    vector_store,
+)
+from app.utils.Logging.logger import logger
+
+
+DB_PATH = ingestion_db.DB_PATH
+
+STAGES = ("load", "split", "embed", "write", "tables", "register", "enrich")
+# Chunks embedded per batch sent from a worker process to the writer
+_EMBED_BATCH = 64
+# How long a worker waits for the writer to answer an existing-ids lookup
+_LOOKUP_TIMEOUT_S = 300.0
+
+_schema_ready = False
+_lock = threading.Lock()
+_wake = threading.Event()
+_stop = threading.Event()
+_dispatcher: Optional[threading.Thread] = None
+_runners: Optional[ThreadPoolExecutor] = None
+_processes: Optional[ProcessPoolExecutor] = None
+_manager: Any = None
+_slots: Optional[threading.BoundedSemaphore] = None
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _connect() -> sqlite3.Connection:
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    return conn
+
+
+def _ensure_schema() -> None:
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _connect() as conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ingestion_jobs (
+                id TEXT PRIMARY KEY,
+                agent TEXT NOT NULL,
+                file TEXT NOT NULL,
+                file_hash TEXT,
+                force INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,             -- queued | running | succeeded | failed
+                stage TEXT,                       -- stage currently executing
+                progress TEXT NOT NULL,           -- JSON {stage: {state, done, total}}
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                result TEXT,                      -- JSON summary on success
+                not_before REAL NOT NULL DEFAULT 0,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                started_at TEXT,
+                finished_at TEXT
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_status ON ingestion_jobs(status, not_before)"
+        )
+        conn.commit()
+    _schema_ready = True
+
+
+def _row_to_job(cols: List[str], row: Any) -> Dict[str, Any]:
+    job = dict(zip(cols, row))
+    for key in ("progress", "result"):
+        raw = job.get(key)
+        if isinstance(raw, str) and raw:
+            try:
+                job[key] = json.loads(raw)
+            except json.JSONDecodeError:
+                pass
+    job["force"] = bool(job.get("force"))
+    return job
+
+
+def enqueue(agent: str, file: str, *, file_hash: Optional[str] = None, force: bool = False) -> str:
+    """Queue ingestion of ``file`` for ``agent`` and return the job id.
+
+    An identical job (same agent, file and hash) that is still queued or running
+    is reused instead of creating a duplicate.
+    """
+    _ensure_schema()
+    agent_name = (agent or "").strip().lower()
+    if not agent_name:
+        raise ValueError("agent name required for ingestion job")
+
+    now = _now()
+    progress = json.dumps({stage: {"state": "pending"} for stage in STAGES})
+    with _connect() as conn:
+        cur = conn.execute(
+            """
+            SELECT id FROM ingestion_jobs
+            WHERE agent=? AND file=? AND IFNULL(file_hash, '')=? AND status IN ('queued', 'running')
+            ORDER BY created_at DESC LIMIT 1
+            """,
+            (agent_name, file, file_hash or ""),
+        )
+        row = cur.fetchone()
+        if row and not force:
+            return row[0]
+        job_id = uuid.uuid4().hex
+        conn.execute(
+            """
+            INSERT INTO ingestion_jobs (
+                id, agent, file, file_hash, force, status, progress, created_at, updated_at
+            ) VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?)
+            """,
+            (job_id, agent_name, file, file_hash, int(bool(force)), progress, now, now),
+        )
+        conn.commit()
+    logger.info("Ingestion job queued | job=%s | agent=%s | file=%s", job_id, agent_name, file)
+    _wake.set()
+    return job_id
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    _ensure_schema()
+    with _connect() as conn:
+        cur = conn.execute("SELECT * FROM ingestion_jobs WHERE id=?", (job_id,))
+        row = cur.fetchone()
+        cols = [c[0] for c in cur.description]
+    return _row_to_job(cols, row) if row else None
+
+
+def pending_collections() -> List[str]:
+    """Collections that queued or running jobs will write to or register."""
+    _ensure_schema()
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT file, file_hash FROM ingestion_jobs WHERE status IN ('queued', 'running')"
+        ).fetchall()
+    names = [_job_collection(file, file_hash) for file, file_hash in rows]
+    return [name for name in names if name]
+
+
+def _job_collection(file: str, file_hash: Optional[str]) -> Optional[str]:
+    if file_hash:
+        return f"{Path(file).stem}-{file_hash[:12]}"
+    try:
+        return insight_services.collection_name_for(file)
+    except Exception:
+        # File vanished; its job will fail on its own
+        return None
+
+
+def _set_stage(
+    job_id: str,
+    stage: str,
+    state: str,
+    *,
+    done: Optional[int] = None,
+    total: Optional[int] = None,
+) -> None:
+    """Record per-stage progress; safe to call from worker processes."""
+    entry: Dict[str, Any] = {"state": state}
+    if done is not None:
+        entry["done"] = done
+    if total is not None:
+        entry["total"] = total
+    with _connect() as conn:
+        # json_set keeps concurrent updates from the worker and the writer atomic per stage
+        conn.execute(
+            """
+            UPDATE ingestion_jobs
+            SET progress=json_set(progress, ?, json(?)), stage=?, updated_at=?
+            WHERE id=?
+            """,
+            (f"$.{stage}", json.dumps(entry), stage, _now(), job_id),
+        )
+        conn.commit()
+
+
+def _claim_next() -> Optional[Dict[str, Any]]:
+    with _connect() as conn:
+        cur = conn.execute(
+            """
+            SELECT id FROM ingestion_jobs
+            WHERE status='queued' AND not_before<=?
+            ORDER BY created_at ASC LIMIT 1
+            """,
+            (time.time(),),
+        )
+        row = cur.fetchone()
+        if not row:
+            return None
+        now = _now()
+        claimed = conn.execute(
+            """
+            UPDATE ingestion_jobs
+            SET status='running', attempts=attempts+1, error=NULL, started_at=?, updated_at=?
+            WHERE id=? AND status='queued'
+            """,
+            (now, now, row[0]),
+        ).rowcount
+        conn.commit()
+    return get_job(row[0]) if claimed else None
+
+
+def _finish(job_id: str, *, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None,
+            retry_in: Optional[float] = None) -> None:
+    now = _now()
+    with _connect() as conn:
+        if error is None:
+            conn.execute(
+                """
+                UPDATE ingestion_jobs
+                SET status='succeeded', stage=NULL, result=?, updated_at=?, finished_at=?
+                WHERE id=?
+                """,
+                (json.dumps(result or {}), now, now, job_id),
+            )
+        elif retry_in is not None:
+            conn.execute(
+                """
+                UPDATE ingestion_jobs
+                SET status='queued', error=?, not_before=?, updated_at=?
+                WHERE id=?
+                """,
+                (error, time.time() + retry_in, now, job_id),
+            )
+        else:
+            conn.execute(
+                """
+                UPDATE ingestion_jobs
+                SET status='failed', error=?, updated_at=?, finished_at=?
+                WHERE id=?
+                """,
+                (error, now, now, job_id),
+            )
+        conn.commit()
+
+
+# -------------------------------
+# Worker process side: load → split → embed
+# -------------------------------
+def _prepare_chunks(job_id: str, file_location: str, out: Any, replies: Any = None) -> int:
+    """Run CPU-heavy stages and stream embedded batches to the writer via ``out``.
+
+    With ``replies`` (incremental re-index), each batch's ids are first sent as a
+    ``lookup``; the writer answers on ``replies`` with those already present in the
+    previous revision's collection, which are sent as ``keep`` messages and not
+    embedded. Batches are produced lazily, so a streamed CSV holds at most one row
+    window plus ``INGEST_QUEUE_DEPTH`` batches in memory.
+    """
+    def lookup(ids: List[str]) -> List[str]:
+        out.put(("lookup", ids))
+        return replies.get(timeout=_LOOKUP_TIMEOUT_S)
+
+    try:
+        emb = embeddings.get_ingest_embeddings()
+        done = 0
+        _set_stage(job_id, "embed", "running", done=0)
+        # CSVs stream window by window, so the embed total is only known at the end
+        for keep, new in insight_services.iter_chunk_diff(
+            file_location,
+            lookup if replies is not None else None,
+            batch_size=_EMBED_BATCH,
+            progress=partial(_set_stage, job_id),
+        ):
+            if keep:
+                out.put(("keep", [i for i, _ in keep], [dict(c.metadata or {}) for _, c in keep]))
+            if new:
+                texts = [c.page_content for _, c in new]
+                vectors = emb.embed_documents(texts)
+                out.put(("batch", [i for i, _ in new], texts, [dict(c.metadata or {}) for _, c in new], vectors))
+            done += len(keep) + len(new)
+            _set_stage(job_id, "embed", "running", done=done)
+        _set_stage(job_id, "embed", "done", done=done, total=done)
+        out.put(("done", done))
+        return done
+    except Exception as e:
+        out.put(("error", f"{type(e).__name__}: {e}"))
+        raise
+
+
+# -------------------------------
+# API process side: write → register → enrich
+# -------------------------------
+def _drain(
+    job_id: str,
+    collection: str,
+    inbox: Any,
+    future: Future,
+    previous: Optional[str],
+    replies: Any = None,
+) -> Dict[str, int]:
+    counts = {"added": 0, "kept": 0}
+    _set_stage(job_id, "write", "running", done=0)
+    while True:
+        try:
+            msg = inbox.get(timeout=1.0)
+        except queue_mod.Empty:
+            if future.done():
+                raise RuntimeError(f"Ingestion worker exited without result: {future.exception()}")
+            continue
+        kind = msg[0]
+        if kind == "lookup":
+            # Diff one batch against the previous revision; never loads its full id list
+            replies.put(vector_store.existing_ids(previous, msg[1]))
+            continue
+        if kind == "batch":
+            _, ids, texts, metadatas, vectors = msg
+            vector_store.add_embedded(collection, ids=ids, texts=texts, metadatas=metadatas, vectors=vectors)
+            counts["added"] += len(ids)
+        elif kind == "keep":
+            # Unchanged chunk: carry its stored vector over from the previous revision
+            _, ids, metadatas = msg
+            counts["kept"] += vector_store.copy_chunks(previous, collection, ids=ids, metadatas=metadatas)
+        elif kind == "done":
+            written = counts["added"] + counts["kept"]
+            _set_stage(job_id, "write", "done", done=written, total=written)
+            return counts
+        else:
+            raise RuntimeError(msg[1] if len(msg) > 1 else "ingestion worker failed")
+        _set_stage(job_id, "write", "running", done=counts["added"] + counts["kept"])
+
+
+def _register(agent: str, file: str, file_location: str, collection: str, file_hash: Optional[str]) -> None:
+    """Persist the collection name for (agent, file), preserving existing title/keywords."""
+    try:
+        rows = ingestion_db.list_documents(agent)
+        row = next((r for r in rows if isinstance(r, dict) and r.get("file") == file), None)
+    except Exception:
+        row = None
+
+    title = (row or {}).get("title") if isinstance(row, dict) else None
+    keywords = (row or {}).get("keywords") if isinstance(row, dict) else None
+
+    ingestion_db.upsert_document(
+        agent=agent,
+        file=file,
+        title=title,
+        vector_collection=collection,
+        keywords=keywords,
+    )
+    # Persist the fingerprint on the (possibly new) row so later lookups skip hashing
+    digest = file_hash or fingerprints.file_hash(file_location, file=file)
+    fingerprints.record(file_location, digest, file=file)
+
+
+def _enrich(agent: str, file: str) -> None:
+    # Imported lazily: agent services pull in the LLM stack, which worker processes never need
+    from app.services.agents import dochelp_service, recruiter_service
+
+    dochelp_service.ingest_document(file, agent=agent)
+    if agent == recruiter_service.AGENT_NAME:
+        # Keep the recruiter-wide candidate index in sync with the resume's collection
+        recruiter_service.index_candidate(file)
+
+
+def _process_pool() -> ProcessPoolExecutor:
+    global _processes
+    with _lock:
+        if _processes is None:
+            _processes = ProcessPoolExecutor(
+                max_workers=max(1, int(settings.INGEST_WORKERS)),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _processes
+
+
+def _reset_process_pool() -> None:
+    global _processes
+    with _lock:
+        if _processes is not None:
+            _processes.shutdown(wait=False, cancel_futures=True)
+        _processes = None
+
+
+def _run_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    job_id, agent, file = job["id"], job["agent"], job["file"]
+    file_location = insight_services._resolve_path(file)
+    collection = insight_services.collection_name_for(file, file_location)
+    previous = (ingestion_db.get_document(agent, file) or {}).get("vector_collection") or None
+
+    if job.get("force"):
+        vector_store.drop_collection(collection)
+
+    result: Dict[str, Any] = {"collection": collection}
+    tables: Optional[Future] = None
+    if settings.CSV_TABLES_ENABLED and Path(file_location).suffix.lower() == ".csv":
+        # The typed SQL table loads in another worker while the vector stages run
+        _set_stage(job_id, "tables", "running")
+        digest = job.get("file_hash") or fingerprints.file_hash(file_location, file=file)
+        tables = _process_pool().submit(csv_tables.load_csv, file_location, file=file, file_hash=digest)
+    else:
+        _set_stage(job_id, "tables", "skipped")
+
+    if vector_store.collection_count(collection) > 0:
+        logger.info("Ingestion job reusing existing vectors | job=%s | collection=%s", job_id, collection)
+        for stage in ("load", "split", "embed", "write"):
+            _set_stage(job_id, stage, "skipped")
+    else:
+        # A new revision of a registered file: diff against the previous collection's chunks
+        incremental = bool(
+            previous and previous != collection and not job.get("force")
+            and vector_store.collection_count(previous) > 0
+        )
+        inbox = _manager.Queue(maxsize=max(1, int(settings.INGEST_QUEUE_DEPTH)))
+        replies = _manager.Queue() if incremental else None
+        future = _process_pool().submit(_prepare_chunks, job_id, file_location, inbox, replies)
+        try:
+            counts = _drain(job_id, collection, inbox, future, previous if incremental else None, replies)
+        except BaseException:
+            # Never leave a partial collection behind; it would look "ready" to the retry
+            vector_store.drop_collection(collection)
+            raise
+        result.update(counts)
+        if incremental:
+            result.update(insight_services.diff_counts(vector_store.collection_count(previous), **counts))
+            result["previous"] = previous
+
+    if tables is not None:
+        info = tables.result()
+        result["csv_table"] = info.get("table")
+        _set_stage(job_id, "tables", "done", done=info.get("row_count"), total=info.get("row_count"))
+
+    _set_stage(job_id, "register", "running")
+    _register(agent, file, file_location, collection, job.get("file_hash"))
+    if previous and previous != collection:
+        # Registry now points at the new revision; drop the old one unless still referenced
+        insight_services.retire_collection(previous)
+    _set_stage(job_id, "register", "done")
+
+    _set_stage(job_id, "enrich", "running")
+    _enrich(agent, file)
+    _set_stage(job_id, "enrich", "done")
+    return result
+
+
+def _run_and_release(job: Dict[str, Any]) -> None:
+    job_id = job["id"]
+    started = time.perf_counter()
+    try:
+        result = _run_job(job)
+        result["elapsed_s"] = round(time.perf_counter() - started, 2)
+        _finish(job_id, result=result)
+        logger.info("Ingestion job succeeded | job=%s | file=%s | result=%s", job_id, job["file"], result)
+    except Exception as e:
+        if isinstance(e, BrokenProcessPool):
+            _reset_process_pool()
+        error = f"{type(e).__name__}: {e}"
+        attempts = int(job.get("attempts") or 1)
+        if attempts < int(settings.INGEST_MAX_ATTEMPTS):
+            backoff = float(settings.INGEST_RETRY_BACKOFF_S) * (2 ** (attempts - 1))
+            _finish(job_id, error=error, retry_in=backoff)
+            logger.warning(
+                "Ingestion job failed; retrying | job=%s | attempt=%d | retry_in=%.0fs | error=%s",
+                job_id, attempts, backoff, error,
+            )
+        else:
+            _finish(job_id, error=error)
+            logger.error("Ingestion job failed | job=%s | attempts=%d | error=%s", job_id, attempts, error)
+    finally:
+        if _slots is not None:
+            _slots.release()
+        _wake.set()
+
+
+def _dispatch_loop() -> None:
+    poll = float(settings.INGEST_POLL_INTERVAL_S)
+    while not _stop.is_set():
+        if not _slots.acquire(timeout=poll):
+            continue
+        try:
+            job = _claim_next()
+        except Exception as e:
+            logger.error("Ingestion dispatcher failed to claim a job | error=%s", e)
+            job = None
+        if job is None:
+            _slots.release()
+            _wake.wait(poll)
+            _wake.clear()
+            continue
+        _runners.submit(_run_and_release, job)
+
+
+def start() -> None:
+    """Start the dispatcher and worker pools; re-queues jobs interrupted by a restart."""
+    global _dispatcher, _runners, _manager, _slots
+    if _dispatcher is not None:
+        return
+    _ensure_schema()
+    with _connect() as conn:
+        interrupted = conn.execute(
+            "SELECT file, file_hash FROM ingestion_jobs WHERE status='running'"
+        ).fetchall()
+        resumed = conn.execute(
+            "UPDATE ingestion_jobs SET status='queued', updated_at=? WHERE status='running'",
+            (_now(),),
+        ).rowcount
+        conn.commit()
+    for file, file_hash in interrupted:
+        # A killed job may have written part of its collection; the retry would take it
+        # for a finished index. Only collections a registry row points at are complete.
+        collection = _job_collection(file, file_hash)
+        if collection and ingestion_db.count_collection_references(collection) == 0:
+            if vector_store.drop_collection(collection):
+                logger.info("Dropped partial collection of interrupted job | collection=%s", collection)
+    if resumed:
+        logger.info("Ingestion jobs re-queued after restart | count=%d", resumed)
+
+    workers = max(1, int(settings.INGEST_WORKERS))
+    _stop.clear()
+    _slots = threading.BoundedSemaphore(workers)
+    _runners = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest-job")
+    _manager = multiprocessing.get_context("spawn").Manager()
+    _dispatcher = threading.Thread(target=_dispatch_loop, name="ingest-dispatcher", daemon=True)
+    _dispatcher.start()
+    logger.info("Ingestion job queue started | workers=%d", workers)
+
+
+def stop() -> None:
+    global _dispatcher, _runners, _manager
+    if _dispatcher is None:
+        return
+    _stop.set()
+    _wake.set()
+    _dispatcher.join(timeout=5)
+    _dispatcher = None
+    if _runners is not None:
+        _runners.shutdown(wait=False, cancel_futures=True)
+        _runners = None
+    _reset_process_pool()
+    if _manager is not None:
+        _manager.shutdown()
+        _manager = None
+    logger.info("Ingestion job queue stopped")
+
+
+__all__ = [
+    "STAGES",
+    "enqueue",
+    "get_job",
+    "pending_collections",
+    "start",
+    "stop",
+]
@@ -1,13 +1,17 @@
 from langchain_community.document_loaders import PyPDFLoader, CSVLoader, TextLoader, Docx2txtLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
-from langchain_chroma import Chroma
 from app.utils.Logging.logger import logger
+import csv
+import hashlib
 import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from app.core.config import settings    
-from app.utils.fileops.fileutils import hash_file
 from langchain_core.documents import Document
+from app.services.generic import embeddings, fingerprints, ingestion_db, text_cache, vector_store
+from app.utils.fileops import pdf_extract
 
 # Expect OPENAI_API_KEY in env.
 # If you're using Azure OpenAI, see the notes below.
@@ -23,92 +27,290 @@ def _resolve_path(file: str) -> str:
     return str(Path(settings.UPLOAD_DIR) / file)
 
 
+def collection_name_for(file: str, file_location: str | None = None) -> str:
+    """Content-based collection name ``{stem}-{sha256[:12]}`` using the fingerprint cache."""
+    location = file_location or _resolve_path(file)
+    file_hash = fingerprints.file_hash(location, file=Path(file).name)
+    return f"{Path(file).stem}-{file_hash[:12]}"
+
+
+def _load_pdf_parallel(file_location: str) -> Optional[List[Document]]:
+    """Extract large PDFs page-range-wise across a process pool.
+
+    Returns None for small documents or when parallelism is disabled, in which
+    case the caller falls back to PyPDFLoader. Metadata matches PyPDFLoader's
+    ``source``/``page`` keys so ``build_prompt`` citations are unchanged.
+    """
+    workers = int(settings.PDF_EXTRACT_WORKERS)
+    if workers <= 1:
+        return None
+    try:
+        total = pdf_extract.page_count(file_location)
+    except Exception as e:
+        logger.warning(f"PDF page count failed; using sequential loader | file={file_location} | error={e}")
+        return None
+    if total < int(settings.PDF_PARALLEL_MIN_PAGES):
+        return None
+
+    pages = pdf_extract.extract_pages(file_location, workers=workers, total=total)
+    logger.info(f"PDF extracted in parallel | file={file_location} | pages={total} | workers={workers}")
+    documents: List[Document] = []
+    for idx, text, label in pages:
+        meta: Dict[str, Any] = {"source": file_location, "page": idx, "total_pages": total}
+        if label is not None:
+            meta["page_label"] = label
+        documents.append(Document(page_content=text, metadata=meta))
+    return documents
+
+
+def _parse_documents(file_location: str) -> List[Document]:
+    """Parse the file into LangChain documents with the type's loader."""
+    ext = Path(file_location).suffix.lower()
+    if ext == '.csv':
+        loader = CSVLoader(file_location)
+    elif ext == '.pdf':
+        parallel = _load_pdf_parallel(file_location)
+        if parallel is not None:
+            return parallel
+        loader = PyPDFLoader(file_location)
+    elif ext == '.docx':
+        loader = Docx2txtLoader(file_location)
+    elif ext == '.doc':
+        try:
+            from langchain_community.document_loaders import UnstructuredFileLoader  # optional heavy dep
+            loader = UnstructuredFileLoader(file_location)
+        except Exception:
+            raise ValueError(f"Unsupported file type (requires unstructured): {file_location}")
+    elif ext in ('.txt', '.md'):
+        loader = TextLoader(file_location, encoding='utf-8')
+    else:
+        raise ValueError(f"Unsupported file type: {file_location}")
+    return loader.load()
+
+
+def _csv_row_text(row: Dict[Any, Any]) -> str:
+    # Same "column: value" rendering as CSVLoader so chunk ids stay stable across loaders
+    def _value(v: Any) -> Any:
+        if isinstance(v, str):
+            return v.strip()
+        if isinstance(v, list):
+            return ",".join(map(str.strip, v))
+        return v
+
+    return "\n".join(f"{k.strip() if k is not None else k}: {_value(v)}" for k, v in row.items())
+
+
+def iter_csv_windows(file_location: str, rows: Optional[int] = None) -> Iterator[List[Document]]:
+    """Yield the CSV's row documents in windows of ``rows`` without reading the whole file."""
+    size = max(1, int(rows or settings.CSV_STREAM_BATCH_ROWS))
+    window: List[Document] = []
+    with open(file_location, newline="") as f:
+        for i, row in enumerate(csv.DictReader(f)):
+            window.append(Document(page_content=_csv_row_text(row), metadata={"source": file_location, "row": i}))
+            if len(window) >= size:
+                yield window
+                window = []
+    if window:
+        yield window
+
+
+def load_documents(file_location: str) -> List[Document]:
+    """Load stage: parsed documents, served from the extracted-text cache when possible."""
+    if not settings.EXTRACTED_TEXT_CACHE_ENABLED:
+        return _parse_documents(file_location)
+
+    file_hash = fingerprints.file_hash(file_location)
+    cached = text_cache.load(file_hash, source=file_location)
+    if cached is not None:
+        logger.info(f"Extracted text cache hit | file={file_location} | documents={len(cached)}")
+        return cached
+
+    documents = _parse_documents(file_location)
+    try:
+        text_cache.store(file_hash, documents)
+    except Exception as e:
+        logger.warning(f"Extracted text cache write failed | file={file_location} | error={e}")
+    return documents
+
+
+def split_documents(documents: List[Document], ext: str) -> List[Document]:
+    """Split stage: chunk loaded documents with per-type sizes."""
+    # Tune chunking per type: larger chunks for markdown and PDFs to keep structure/table rows together
+    if ext == '.md':
+        splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=120)
+    elif ext in ('.pdf', '.docx', '.doc'):
+        splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=150)
+    else:
+        splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
+    return splitter.split_documents(documents)
+
+
+def assign_chunk_ids(chunks: List[Document]) -> List[str]:
+    """Content-derived chunk ids (sha256 of text + occurrence index) for incremental diffs.
+
+    Identical chunks are numbered within their source row for CSVs (``row``
+    metadata) and within the chunks passed in otherwise (the whole document), so
+    streamed CSVs need no file-wide state. Also stamps ``chunk_hash`` into each chunk's metadata.
+    """
+    seen: Dict[Tuple[Any, str], int] = {}
+    ids: List[str] = []
+    for chunk in chunks:
+        digest = hashlib.sha256((chunk.page_content or "").encode("utf-8")).hexdigest()
+        row = (chunk.metadata or {}).get("row")
+        occurrence = seen.get((row, digest), 0)
+        seen[(row, digest)] = occurrence + 1
+        chunk.metadata = {**(chunk.metadata or {}), "chunk_hash": digest}
+        ids.append(f"{digest[:32]}-{occurrence}" if row is None else f"{digest[:32]}-r{row}-{occurrence}")
+    return ids
+
+
+def iter_chunk_batches(
+    file_location: str,
+    *,
+    batch_size: int = 256,
+    progress: Optional[Callable[..., None]] = None,
+) -> Iterator[Tuple[List[str], List[Document]]]:
+    """Yield ``(ids, chunks)`` batches for the file, ready to embed and write.
+
+    CSVs are streamed window by window (load → split → id per window), so peak
+    memory is bounded by ``CSV_STREAM_BATCH_ROWS`` rather than the row count; they
+    bypass the extracted-text cache for the same reason. Their chunk ids include
+    the row number, so an inserted row changes the ids of the rows after it; the
+    chunk-embedding cache still serves those chunks' vectors. Other types are loaded
+    whole and sliced into batches of ``batch_size`` chunks.
+
+    ``progress(stage, state, done=..., total=...)`` is called for the load/split stages.
+    """
+    report = progress or (lambda *args, **kwargs: None)
+    ext = Path(file_location).suffix.lower()
+
+    if ext == '.csv':
+        rows, total_chunks = 0, 0
+        report("load", "running", done=0)
+        report("split", "running", done=0)
+        for window in iter_csv_windows(file_location):
+            rows += len(window)
+            chunks = split_documents(window, ext)
+            del window
+            total_chunks += len(chunks)
+            report("load", "running", done=rows)
+            report("split", "running", done=total_chunks)
+            ids = assign_chunk_ids(chunks)
+            for start in range(0, len(chunks), batch_size):
+                yield ids[start : start + batch_size], chunks[start : start + batch_size]
+        report("load", "done", done=rows, total=rows)
+        report("split", "done", done=total_chunks, total=total_chunks)
+        return
+
+    report("load", "running")
+    documents = load_documents(file_location)
+    report("load", "done", done=len(documents), total=len(documents))
+    report("split", "running")
+    chunks = split_documents(documents, ext)
+    del documents
+    ids = assign_chunk_ids(chunks)
+    report("split", "done", done=len(chunks), total=len(chunks))
+    for start in range(0, len(chunks), batch_size):
+        yield ids[start : start + batch_size], chunks[start : start + batch_size]
+
+
+def iter_chunk_diff(
+    file_location: str,
+    present: Optional[Callable[[List[str]], Iterable[str]]] = None,
+    *,
+    batch_size: int = 256,
+    progress: Optional[Callable[..., None]] = None,
+) -> Iterator[Tuple[List[Tuple[str, Document]], List[Tuple[str, Document]]]]:
+    """Incremental mode: yield ``(kept, added)`` ``(id, chunk)`` pairs per batch.
+
+    ``present(ids)`` returns those of a batch's ids already stored in the previous
+    revision's collection; it is asked one batch at a time, so the previous id set
+    is never held whole. Kept chunks can be copied with their stored vectors; only
+    added ones need embedding. Without ``present`` every chunk is added.
+    """
+    for ids, chunks in iter_chunk_batches(file_location, batch_size=batch_size, progress=progress):
+        found = frozenset(present(ids)) if present is not None and ids else frozenset()
+        pairs = list(zip(ids, chunks))
+        yield [p for p in pairs if p[0] in found], [p for p in pairs if p[0] not in found]
+
+
+def diff_counts(previous_count: int, kept: int, added: int) -> Dict[str, int]:
+    """Summary of an incremental re-index; chunks of the previous revision not kept were removed."""
+    return {"kept": kept, "added": added, "removed": max(previous_count - kept, 0)}
+
+
+# Collections being written in this process outside the job queue (name -> active builds);
+# vector_gc skips them, since no registry row or queued job protects them yet
+_building: Dict[str, int] = {}
+_building_lock = threading.Lock()
+
+
+@contextmanager
+def _build_guard(collection: str) -> Iterator[None]:
+    with _building_lock:
+        _building[collection] = _building.get(collection, 0) + 1
+    try:
+        yield
+    finally:
+        with _building_lock:
+            _building[collection] -= 1
+            if not _building[collection]:
+                del _building[collection]
+
+
+def building_collections() -> List[str]:
+    """Collections currently being built by ``create_vector_store``."""
+    with _building_lock:
+        return list(_building)
+
+
+def retire_collection(collection: str) -> bool:
+    """Drop a superseded collection once no registry row references it."""
+    if not collection or ingestion_db.count_collection_references(collection) > 0:
+        return False
+    return vector_store.drop_collection(collection)
+
+
 def create_vector_store(file: str, force: bool = False):
     try:
         # Resolve path: absolute → BASE_DIR → UPLOAD_DIR
         file_location = _resolve_path(file)
-        # Stable, content-based collection name using file hash
-        file_hash = hash_file(file_location)
-
-        # Prepare embedding function (lazy network usage happens only on add_documents)
-        if settings.APP_ENV == "development":
-            from langchain_huggingface import HuggingFaceEmbeddings
-            embedding = HuggingFaceEmbeddings(model_name=settings.HUGGINGFACE_EMBEDDING_MODEL)
-            logger.info(f"Embeddings backend | provider=huggingface | model={settings.HUGGINGFACE_EMBEDDING_MODEL} | file={file}")
-        else:
-            embedding = OpenAIEmbeddings(
-                api_key=settings.OPENAI_API_KEY,
-                model=settings.OPENAI_EMBEDDING_MODEL,
-            )
-            logger.info(f"Embeddings backend | provider=openai | model={settings.OPENAI_EMBEDDING_MODEL} | file={file}")
-
-        # Create/load Chroma collection
+
+        # Shared embedding function behind the chunk cache (backend is only called for misses)
+        provider, model = embeddings.default_backend()
+        logger.info(f"Embeddings backend | provider={provider} | model={model} | file={file}")
+
+        # Create/load Chroma collection through the shared client
         persist_dir = Path(settings.VECTOR_STORE_DIR)
-        stem = Path(file).stem
-        VECTOR_COLLECTION = f"{stem}-{file_hash[:12]}"
+        # Stable, content-based collection name using file hash
+        VECTOR_COLLECTION = collection_name_for(file, file_location)
         logger.info(f"Using Chroma collection for file {file}: {VECTOR_COLLECTION}")
-        vs = Chroma(
-            collection_name=VECTOR_COLLECTION,
-            persist_directory=persist_dir,
-            embedding_function=embedding,
-        )
-        try:
-            existing = int(vs._collection.count())  # type: ignore[attr-defined]
-        except Exception:
-            existing = 0
-
-        # Optionally force a rebuild by deleting the existing collection
-        if force and existing and existing > 0:
-            try:
-                # Best-effort drop using underlying client
-                if hasattr(vs, "_client"):
-                    vs._client.delete_collection(VECTOR_COLLECTION)  # type: ignore[attr-defined]
+        with _build_guard(VECTOR_COLLECTION):
+            existing = vector_store.collection_count(VECTOR_COLLECTION)
+
+            # Optionally force a rebuild by deleting the existing collection
+            if force and existing and existing > 0:
+                # Dropping also invalidates the cached handle so readers re-resolve it
+                if vector_store.drop_collection(VECTOR_COLLECTION):
                     logger.info(f"Deleted existing collection for rebuild: {VECTOR_COLLECTION}")
-                # Recreate a fresh handle after deletion
-                vs = Chroma(
-                    collection_name=VECTOR_COLLECTION,
-                    persist_directory=persist_dir,
-                    embedding_function=embedding,
-                )
-                existing = 0
-            except Exception as e:
-                logger.warning(f"Force rebuild requested but deletion failed; proceeding to add docs fresh: {e}")
-
-        if existing and existing > 0:
-            logger.info(f"Collection already exists with {existing} docs; skipping re-ingestion | file={file} | collection={VECTOR_COLLECTION}")
-            return vs
+                    existing = 0
+                else:
+                    logger.warning("Force rebuild requested but deletion failed; proceeding to add docs fresh")
+
+            vs = vector_store.get_store(VECTOR_COLLECTION)
+            if existing and existing > 0:
+                logger.info(f"Collection already exists with {existing} docs; skipping re-ingestion | file={file} | collection={VECTOR_COLLECTION}")
+                return vs
 
-        # Fresh ingestion only if empty: load, split, embed
-        ext = Path(file_location).suffix.lower()
-        if ext == '.csv':
-            loader = CSVLoader(file_location)
-        elif ext == '.pdf':
-            loader = PyPDFLoader(file_location)
-        elif ext == '.docx':
-            loader = Docx2txtLoader(file_location)
-        elif ext == '.doc':
-            try:
-                from langchain_community.document_loaders import UnstructuredFileLoader  # optional heavy dep
-                loader = UnstructuredFileLoader(file_location)
-            except Exception:
-                raise ValueError(f"Unsupported file type (requires unstructured): {file}")
-        elif ext in ('.txt', '.md'):
-            loader = TextLoader(file_location, encoding='utf-8')
-        else:
-            raise ValueError(f"Unsupported file type: {file}")
-        documents = loader.load()
-
-        # Tune chunking per type: larger chunks for markdown and PDFs to keep structure/table rows together
-        if ext == '.md':
-            splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=120)
-        elif ext in ('.pdf', '.docx', '.doc'):
-            splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=150)
-        else:
-            splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-        chunks = splitter.split_documents(documents)
-        vs.add_documents(chunks)
-        logger.info(f"Vector store created/updated | file={file} | collection={VECTOR_COLLECTION} | dir={persist_dir} | chunks={len(chunks)}")
-        return vs
+            # Fresh ingestion only if empty: load, split, embed — written batch by batch
+            written = 0
+            for ids, chunks in iter_chunk_batches(file_location):
+                vs.add_documents(chunks, ids=ids)
+                vector_store.mark_changed(VECTOR_COLLECTION)
+                written += len(chunks)
+                logger.debug(f"Vector store batch written | collection={VECTOR_COLLECTION} | chunks={written}")
+            logger.info(f"Vector store created/updated | file={file} | collection={VECTOR_COLLECTION} | dir={persist_dir} | chunks={written}")
+            return vs
     except Exception as e:
         logger.error(f"Error creating vector store for file {file}: {e}")
         raise
@@ -133,29 +335,10 @@ def check_vector_ready(file: str) -> dict:
                 "ready": False,
             }
 
-        file_hash = hash_file(file_location)
-        stem = Path(file).stem
-        VECTOR_COLLECTION = f"{stem}-{file_hash[:12]}"
-
-        # Prepare embedding function (consistent with ingestion)
-        if settings.APP_ENV == "development":
-            from langchain_huggingface import HuggingFaceEmbeddings
-            embedding = HuggingFaceEmbeddings(model_name=settings.HUGGINGFACE_EMBEDDING_MODEL)
-        else:
-            embedding = OpenAIEmbeddings(
-                api_key=settings.OPENAI_API_KEY,
-                model=settings.OPENAI_EMBEDDING_MODEL,
-            )
-
-        vs = Chroma(
-            collection_name=VECTOR_COLLECTION,
-            persist_directory=Path(settings.VECTOR_STORE_DIR),
-            embedding_function=embedding,
-        )
-        try:
-            count = int(vs._collection.count())  # type: ignore[attr-defined]
-        except Exception:
-            count = 0
+        VECTOR_COLLECTION = collection_name_for(file, file_location)
+
+        # Does not create the collection when it is missing
+        count = vector_store.collection_count(VECTOR_COLLECTION)
 
         return {
             "file": file,
@@ -186,27 +369,14 @@ def add_facts_document(file: str, facts_text: str, metadata: dict | None = None)
     Returns the collection name used.
     """
     # Resolve collection name consistent with create_vector_store/check_vector_ready
-    file_location = _resolve_path(file)
-    file_hash = hash_file(file_location)
-    stem = Path(file).stem
-    VECTOR_COLLECTION = f"{stem}-{file_hash[:12]}"
-
-    # Prepare embedding function as in ingestion
-    if settings.APP_ENV == "development":
-        from langchain_huggingface import HuggingFaceEmbeddings
-        embedding = HuggingFaceEmbeddings(model_name=settings.HUGGINGFACE_EMBEDDING_MODEL)
-    else:
-        embedding = OpenAIEmbeddings(
-            api_key=settings.OPENAI_API_KEY,
-            model=settings.OPENAI_EMBEDDING_MODEL,
-        )
-
-    vs = Chroma(
-        collection_name=VECTOR_COLLECTION,
-        persist_directory=Path(settings.VECTOR_STORE_DIR),
-        embedding_function=embedding,
-    )
+    VECTOR_COLLECTION = collection_name_for(file)
+
+    vs = vector_store.get_store(VECTOR_COLLECTION)
     meta = {"source": file, **(metadata or {})}
-    vs.add_documents([Document(page_content=facts_text, metadata=meta)])
+    # Stable id: re-ingesting the same facts replaces the record instead of duplicating it
+    facts_id = "facts-" + hashlib.sha256(facts_text.encode("utf-8")).hexdigest()[:32]
+    vs.add_documents([Document(page_content=facts_text, metadata=meta)], ids=[facts_id])
+    # Cached answers for this collection predate the facts document
+    vector_store.mark_changed(VECTOR_COLLECTION)
     logger.info("Added facts document | file=%s | collection=%s", file, VECTOR_COLLECTION)
     return VECTOR_COLLECTION
@@ -0,0 +1,337 @@
+"""Per-session chat history for agents, kept within a token budget.
+
+Sessions are keyed by (agent, session_id) and hold the recent turns, a rolling
+summary of older turns and the file the session is working on (``doc_file``),
+so follow-ups skip file resolution. Turns beyond ``SESSION_TOKEN_BUDGET`` are
+folded into the summary. Up to ``SESSION_MEMORY_MAX_SESSIONS`` sessions live in
+memory; least recently used ones spill to ``DB_DIR/sessions.sqlite3`` and are
+reloaded on their next request.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+from app.core.config import settings
+from app.utils.Logging.logger import logger
+from app.utils.text.tokens import count_tokens, truncate_tokens
+
+
+DB_PATH = Path(settings.DB_DIR) / "sessions.sqlite3"
+
+# Characters of each rolled-up message kept by the extractive summary
+_EXTRACT_CHARS = 240
+
+_Key = Tuple[str, str]
+
+
+@dataclass
+class _Turn:
+    user: str
+    assistant: str
+    tokens: int = 0
+
+
+@dataclass
+class _Session:
+    turns: List[_Turn] = field(default_factory=list)
+    summary: str = ""
+    doc_file: Optional[str] = None
+    updated_at: float = field(default_factory=time.time)
+
+
+_sessions: "OrderedDict[_Key, _Session]" = OrderedDict()
+# Guards _sessions and the fields of every resident _Session
+_lock = threading.Lock()
+# Orders spill writes against reloads, so a session being evicted is never read back stale
+_io_lock = threading.Lock()
+_schema_ready = False
+
+_T = TypeVar("_T")
+
+
+def _connect() -> sqlite3.Connection:
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    return conn
+
+
+def _ensure_schema() -> None:
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _connect() as conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                agent TEXT NOT NULL,
+                session_id TEXT NOT NULL,
+                state TEXT NOT NULL,              -- JSON {turns, summary, doc_file}
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (agent, session_id)
+            )
+            """
+        )
+        conn.commit()
+    _schema_ready = True
+
+
+def _row(key: _Key, s: _Session) -> Tuple[str, str, str, float]:
+    """Spill-table row for a session; call with ``_lock`` held so turns do not change mid-dump."""
+    state = {"turns": [asdict(t) for t in s.turns], "summary": s.summary, "doc_file": s.doc_file}
+    return key[0], key[1], json.dumps(state, ensure_ascii=False), s.updated_at
+
+
+def _write(rows: List[Tuple[str, str, str, float]]) -> None:
+    if not rows:
+        return
+    _ensure_schema()
+    with _connect() as conn:
+        conn.executemany(
+            """
+            INSERT INTO sessions(agent, session_id, state, updated_at) VALUES(?, ?, ?, ?)
+            ON CONFLICT(agent, session_id) DO UPDATE SET
+                state=excluded.state,
+                updated_at=excluded.updated_at
+            """,
+            rows,
+        )
+        conn.commit()
+
+
+def _read(key: _Key) -> Optional[_Session]:
+    _ensure_schema()
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT state, updated_at FROM sessions WHERE agent=? AND session_id=?", key
+        ).fetchone()
+    if not row or row[1] < time.time() - float(settings.SESSION_TTL_S):
+        return None
+    try:
+        state = json.loads(row[0])
+        return _Session(
+            turns=[_Turn(**t) for t in state.get("turns") or []],
+            summary=state.get("summary") or "",
+            doc_file=state.get("doc_file"),
+            updated_at=row[1],
+        )
+    except Exception as e:
+        logger.warning("Spilled session unreadable; starting fresh | session=%s | error=%s", key[1], e)
+        return None
+
+
+def _expired(session: _Session) -> bool:
+    return session.updated_at < time.time() - float(settings.SESSION_TTL_S)
+
+
+def _resident(key: _Key) -> Optional[_Session]:
+    # Caller holds _lock
+    session = _sessions.get(key)
+    if session is None:
+        return None
+    if _expired(session):
+        del _sessions[key]
+        return None
+    _sessions.move_to_end(key)
+    return session
+
+
+def _with_session(
+    agent: str, session_id: str, fn: Callable[[_Session], _T], *, create: bool
+) -> Optional[_T]:
+    """Run ``fn`` on the session under ``_lock``; None if it does not exist and ``create`` is False.
+
+    The session is resident while ``fn`` runs, so its changes cannot land on an
+    object that was already spilled. Misses reload from SQLite and evict the LRU
+    tail into it.
+    """
+    key = (agent, session_id)
+    with _lock:
+        session = _resident(key)
+        if session is not None:
+            return fn(session)
+    with _io_lock:
+        with _lock:
+            # Another request may have loaded it while we waited
+            session = _resident(key)
+            if session is not None:
+                return fn(session)
+        loaded = _read(key)
+        if loaded is None and not create:
+            return None
+        limit = max(1, int(settings.SESSION_MEMORY_MAX_SESSIONS))
+        rows: List[Tuple[str, str, str, float]] = []
+        with _lock:
+            session = _sessions[key] = loaded or _Session()
+            result = fn(session)
+            while len(_sessions) > limit:
+                evicted_key, evicted = _sessions.popitem(last=False)
+                if not _expired(evicted):
+                    rows.append(_row(evicted_key, evicted))
+        _write(rows)
+    return result
+
+
+def _extractive_summary(summary: str, turns: List[_Turn]) -> str:
+    lines = [line for line in summary.splitlines() if line.strip()]
+    for turn in turns:
+        user = " ".join(turn.user.split())[:_EXTRACT_CHARS]
+        assistant = " ".join(turn.assistant.split())[:_EXTRACT_CHARS]
+        lines.append(f"- User: {user} | Assistant: {assistant}")
+    # Keep the most recent lines that fit
+    limit = int(settings.SESSION_SUMMARY_MAX_TOKENS)
+    while len(lines) > 1 and count_tokens("\n".join(lines)) > limit:
+        lines.pop(0)
+    return truncate_tokens("\n".join(lines), limit)
+
+
+def _llm_summary(summary: str, turns: List[_Turn]) -> str:
+    # Imported lazily: the agent factory pulls in the tool registry
+    from app.agents.agent_factory import get_llm
+
+    transcript = "\n".join(f"User: {t.user}\nAssistant: {t.assistant}" for t in turns)
+    prompt = (
+        f"Update the running summary of a conversation in at most {int(settings.SESSION_SUMMARY_MAX_TOKENS)} tokens. "
+        "Keep file names, facts and open questions; drop pleasantries.\n\n"
+        f"Current summary:\n{summary or '(empty)'}\n\nNew turns:\n{transcript}\n\nUpdated summary:"
+    )
+    result = get_llm(None).invoke(prompt)
+    text = getattr(result, "content", result)
+    return truncate_tokens(str(text).strip(), int(settings.SESSION_SUMMARY_MAX_TOKENS))
+
+
+def _summarize(summary: str, turns: List[_Turn]) -> str:
+    if (settings.SESSION_SUMMARY_MODE or "").lower() == "llm":
+        try:
+            return _llm_summary(summary, turns)
+        except Exception as e:
+            logger.warning("Session summary via LLM failed; using extractive summary | error=%s", e)
+    return _extractive_summary(summary, turns)
+
+
+def _snapshot(agent: str, session_id: Optional[str]) -> Tuple[str, List[_Turn]]:
+    if not session_id:
+        return "", []
+    snapshot = _with_session(agent, session_id, lambda s: (s.summary, list(s.turns)), create=False)
+    return snapshot or ("", [])
+
+
+def history_messages(agent: str, session_id: Optional[str]) -> List[BaseMessage]:
+    """Chat history for the agent prompt: the rolling summary, then recent turns."""
+    summary, turns = _snapshot(agent, session_id)
+    messages: List[BaseMessage] = []
+    if summary:
+        messages.append(SystemMessage(content=f"Summary of the earlier conversation:\n{summary}"))
+    for turn in turns:
+        messages.append(HumanMessage(content=turn.user))
+        messages.append(AIMessage(content=turn.assistant))
+    return messages
+
+
+def history_dicts(agent: str, session_id: Optional[str]) -> List[Dict[str, str]]:
+    """Same history as OpenAI chat messages, for routes that call ``chat_service`` directly."""
+    summary, turns = _snapshot(agent, session_id)
+    messages: List[Dict[str, str]] = []
+    if summary:
+        messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+    for turn in turns:
+        messages.append({"role": "user", "content": turn.user})
+        messages.append({"role": "assistant", "content": turn.assistant})
+    return messages
+
+
+def append_turn(agent: str, session_id: Optional[str], *, user: str, assistant: Any) -> None:
+    """Record a turn and compact the session to ``SESSION_TOKEN_BUDGET``."""
+    if not session_id:
+        return
+    text = assistant if isinstance(assistant, str) else json.dumps(assistant, ensure_ascii=False, default=str)
+    turn = _Turn(user=user or "", assistant=text)
+    turn.tokens = count_tokens(turn.user) + count_tokens(turn.assistant)
+    budget = int(settings.SESSION_TOKEN_BUDGET)
+
+    def _append(session: _Session) -> Tuple[str, List[_Turn], int]:
+        session.turns.append(turn)
+        session.updated_at = time.time()
+        total = count_tokens(session.summary) + sum(t.tokens for t in session.turns)
+        rolled: List[_Turn] = []
+        # Always keep the latest turn verbatim, even if it alone exceeds the budget
+        while total > budget and len(session.turns) > 1:
+            oldest = session.turns.pop(0)
+            rolled.append(oldest)
+            total -= oldest.tokens
+        return session.summary, rolled, len(session.turns)
+
+    summary, rolled, kept = _with_session(agent, session_id, _append, create=True)
+    if not rolled:
+        return
+    # Summarizing may call the LLM; do it outside the lock
+    new_summary = _summarize(summary, rolled)
+
+    def _set_summary(session: _Session) -> None:
+        session.summary = new_summary
+
+    # Re-resolved: the session may have been spilled (and reloaded) meanwhile
+    _with_session(agent, session_id, _set_summary, create=False)
+    logger.info(
+        "Session compacted | agent=%s | session=%s | rolled_turns=%d | kept_turns=%d",
+        agent, session_id, len(rolled), kept,
+    )
+
+
+def get_doc_file(agent: str, session_id: Optional[str]) -> Optional[str]:
+    if not session_id:
+        return None
+    return _with_session(agent, session_id, lambda s: s.doc_file, create=False)
+
+
+def set_doc_file(agent: str, session_id: Optional[str], doc_file: Optional[str]) -> None:
+    if not session_id:
+        return
+
+    def _set(session: _Session) -> None:
+        session.doc_file = doc_file
+        session.updated_at = time.time()
+
+    _with_session(agent, session_id, _set, create=True)
+
+
+def clear(agent: str, session_id: str) -> None:
+    with _io_lock:
+        with _lock:
+            _sessions.pop((agent, session_id), None)
+        _ensure_schema()
+        with _connect() as conn:
+            conn.execute("DELETE FROM sessions WHERE agent=? AND session_id=?", (agent, session_id))
+            conn.commit()
+
+
+def flush() -> int:
+    """Spill all in-memory sessions to SQLite and purge expired ones (app shutdown)."""
+    with _io_lock:
+        with _lock:
+            rows = [_row(k, s) for k, s in _sessions.items() if not _expired(s)]
+        try:
+            _ensure_schema()
+            _write(rows)
+            with _connect() as conn:
+                conn.execute(
+                    "DELETE FROM sessions WHERE updated_at < ?", (time.time() - float(settings.SESSION_TTL_S),)
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.error("Session flush failed | sessions=%d | error=%s", len(rows), e)
+            return 0
+    return len(rows)
+
+
+__all__ = ["append_turn", "clear", "flush", "get_doc_file", "history_dicts", "history_messages", "set_doc_file"]
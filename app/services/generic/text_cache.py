@@ -0,0 +1,99 @@
+"""Persisted output of the load stage, keyed by file hash.
+
+Each file's parsed documents (page texts + metadata) are stored as gzip-compressed
+JSONL under ``DB_DIR/extracted_text``. Forced rebuilds and re-chunking can then
+skip PyPDF/Docx2txt/Unstructured parsing entirely while the bytes are unchanged.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from langchain_core.documents import Document
+
+from app.core.config import settings
+from app.utils.Logging.logger import logger
+
+
+CACHE_DIR = Path(settings.DB_DIR) / "extracted_text"
+_SUFFIX = ".jsonl.gz"
+
+
+def _path_for(file_hash: str) -> Path:
+    # Hashes are hex digests; never let a caller-supplied value escape the cache dir
+    if not file_hash or not all(c in "0123456789abcdef" for c in file_hash.lower()):
+        raise ValueError(f"Invalid file hash: {file_hash!r}")
+    return CACHE_DIR / f"{file_hash.lower()}{_SUFFIX}"
+
+
+def load(file_hash: str, *, source: Optional[str] = None) -> Optional[List[Document]]:
+    """Return cached documents for ``file_hash`` or None on a miss.
+
+    ``source`` overrides the stored ``source`` metadata, since identical bytes may
+    have been uploaded under a different path.
+    """
+    path = _path_for(file_hash)
+    if not path.exists():
+        return None
+    try:
+        documents: List[Document] = []
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                meta = record.get("metadata") or {}
+                if source is not None and "source" in meta:
+                    meta["source"] = source
+                documents.append(Document(page_content=record.get("text") or "", metadata=meta))
+        return documents
+    except Exception as e:
+        logger.warning("Extracted text cache unreadable; re-parsing | hash=%s | error=%s", file_hash[:12], e)
+        return None
+
+
+def store(file_hash: str, documents: List[Document]) -> None:
+    path = _path_for(file_hash)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as f:
+            for doc in documents:
+                f.write(json.dumps({"text": doc.page_content, "metadata": doc.metadata or {}}, ensure_ascii=False))
+                f.write("\n")
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def purge(file_hash: Optional[str] = None) -> Dict[str, Any]:
+    """Delete one cached entry (by hash) or the whole cache; returns what was removed."""
+    targets = [_path_for(file_hash)] if file_hash else list(CACHE_DIR.glob(f"*{_SUFFIX}"))
+    removed, freed = 0, 0
+    for path in targets:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            continue
+        removed += 1
+        freed += size
+    logger.info("Extracted text cache purged | entries=%d | bytes=%d", removed, freed)
+    return {"removed": removed, "bytes_freed": freed}
+
+
+def stats() -> Dict[str, Any]:
+    files = list(CACHE_DIR.glob(f"*{_SUFFIX}")) if CACHE_DIR.exists() else []
+    return {
+        "entries": len(files),
+        "bytes": sum(p.stat().st_size for p in files),
+        "dir": str(CACHE_DIR),
+    }
+
+
+__all__ = ["load", "purge", "stats", "store"]
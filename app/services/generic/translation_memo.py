@@ -0,0 +1,143 @@
+"""Persistent memo of LLM translations, keyed by a hash of the source text.
+
+Stored in ``DB_DIR/translations.sqlite3``. ``translate_once`` also collapses
+concurrent requests for the same text, so each distinct text (per target
+language) is translated at most once across tools, handlers and restarts.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.utils.Logging.logger import logger
+
+
+DB_PATH = Path(settings.DB_DIR) / "translations.sqlite3"
+
+_schema_ready = False
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _connect() -> sqlite3.Connection:
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    return conn
+
+
+def _ensure_schema() -> None:
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _connect() as conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS translations (
+                text_hash TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                source_lang TEXT,
+                translated TEXT NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (text_hash, target_lang)
+            )
+            """
+        )
+        conn.commit()
+    _schema_ready = True
+
+
+def text_hash(text: str) -> str:
+    """Hash of the whitespace-normalized text; re-pasted postings map to the same key."""
+    normalized = " ".join((text or "").split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def lookup(text: str, *, target_lang: str = "en") -> Optional[str]:
+    _ensure_schema()
+    key = text_hash(text)
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT translated FROM translations WHERE text_hash=? AND target_lang=?", (key, target_lang)
+        ).fetchone()
+        if row:
+            conn.execute(
+                "UPDATE translations SET hits = hits + 1 WHERE text_hash=? AND target_lang=?", (key, target_lang)
+            )
+            conn.commit()
+    return row[0] if row else None
+
+
+def store(text: str, translated: str, *, source_lang: Optional[str], target_lang: str = "en") -> None:
+    _ensure_schema()
+    with _connect() as conn:
+        conn.execute(
+            """
+            INSERT INTO translations(text_hash, target_lang, source_lang, translated, created_at)
+            VALUES(?, ?, ?, ?, ?)
+            ON CONFLICT(text_hash, target_lang) DO UPDATE SET
+                source_lang=excluded.source_lang,
+                translated=excluded.translated
+            """,
+            (text_hash(text), target_lang, source_lang, translated, _now()),
+        )
+        conn.commit()
+
+
+def _lock_for(key: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(key, threading.Lock())
+
+
+def translate_once(
+    text: str,
+    translate: Callable[[str], Optional[str]],
+    *,
+    source_lang: Optional[str],
+    target_lang: str = "en",
+) -> Optional[str]:
+    """Return the memoized translation of ``text``, calling ``translate`` only on a miss.
+
+    Concurrent callers with the same text wait for the first one. Empty or None
+    results (failed translations) are not stored, so they are retried next time.
+    """
+    if not settings.TRANSLATION_MEMO_ENABLED:
+        return translate(text)
+    key = f"{text_hash(text)}:{target_lang}"
+    lock = _lock_for(key)
+    try:
+        with lock:
+            cached = lookup(text, target_lang=target_lang)
+            if cached is not None:
+                logger.info("Translation memo hit | hash=%s | source_lang=%s", key[:12], source_lang)
+                return cached
+            translated = translate(text)
+            if translated:
+                store(text, translated, source_lang=source_lang, target_lang=target_lang)
+            return translated
+    finally:
+        with _locks_guard:
+            # Drop the per-text lock once nobody else is waiting on it
+            if not lock.locked():
+                _locks.pop(key, None)
+
+
+def stats() -> Dict[str, Any]:
+    _ensure_schema()
+    with _connect() as conn:
+        entries, hits = conn.execute("SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM translations").fetchone()
+    return {"entries": entries, "hits": hits, "db": str(DB_PATH)}
+
+
+__all__ = ["lookup", "stats", "store", "text_hash", "translate_once"]
@@ -1,23 +1,58 @@
 from app.utils.Logging.logger import logger
 from app.core.config import settings
+from app.services.generic import fingerprints
+from dataclasses import dataclass
+import hashlib
 import os
+import tempfile
 
-async def upload_file(file) -> str:
+
+@dataclass
+class StoredUpload:
+    path: str
+    sha256: str
+    size: int
+
+
+async def upload_file(file) -> StoredUpload:
+    """Stream the upload to disk in fixed-size chunks, hashing it in the same pass.
+
+    Data is written to a temp file in UPLOAD_DIR and atomically renamed into place,
+    so readers never see a partial file and memory use is bounded by the chunk size.
+    """
     logger.info(f"Received file: {file.filename}")
+    tmp_path = None
     try:
         # Ensure the upload directory exists
         os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 
         # Save the uploaded file
         file_location = os.path.join(settings.UPLOAD_DIR, file.filename)
-        
-        with open(file_location, "wb") as f:
-            content = await file.read()
-            f.write(content)
 
-        msg = f"File {file.filename} uploaded successfully at {file_location}"
+        sha256 = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=settings.UPLOAD_DIR, prefix=".upload-", suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                sha256.update(chunk)
+                size += len(chunk)
+                f.write(chunk)
+        os.replace(tmp_path, file_location)
+        tmp_path = None
+
+        digest = sha256.hexdigest()
+        # Seed the fingerprint cache so indexing and retrieval never re-read the file to hash it
+        fingerprints.record(file_location, digest, file=file.filename)
+
+        msg = f"File {file.filename} uploaded successfully at {file_location} | size={size}"
         logger.info(msg)
-        return file_location
+        return StoredUpload(path=file_location, sha256=digest, size=size)
     except Exception as e:
         logger.error(f"Error saving file {file.filename}: {e}")
-        raise "Error uploading file" 
\ No newline at end of file
+        raise
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
@@ -0,0 +1,215 @@
+"""Garbage collection for orphaned Chroma collections.
+
+Collections are named by content hash, so each new revision of a file gets a new
+collection. Ingestion retires the previous one, but collections built outside
+the job queue, by failed jobs or before retirement existed are left behind.
+A sweep deletes every collection that is not referenced by a registry row, not
+written by a queued/running job or an in-process build, not the current
+collection of a file still in ``UPLOAD_DIR`` and not protected (shared indexes),
+then compacts ``chroma.sqlite3``. Sweeps run on a timer (``VECTOR_GC_INTERVAL_S``)
+and on demand via ``/admin/vector-gc``.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.services.generic import ingestion_db, ingestion_jobs, insight_services, vector_store
+from app.utils.Logging.logger import logger
+
+
+_sweep_lock = threading.Lock()
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def _store_dir() -> Path:
+    return Path(settings.VECTOR_STORE_DIR)
+
+
+def _dir_bytes(path: Path) -> int:
+    if not path.exists():
+        return 0
+    if path.is_file():
+        return path.stat().st_size
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def _protected_collections() -> Set[str]:
+    # Imported lazily: agent services pull in the LLM stack
+    from app.services.agents import recruiter_service
+
+    return {recruiter_service.CANDIDATE_INDEX_COLLECTION}
+
+
+def _live_collections() -> Set[str]:
+    """Current collection names of the files in ``UPLOAD_DIR``.
+
+    Covers collections built for files without a registry row (``create_vector_store``,
+    ``initialize_insights``) once their build has finished; hashes come from the
+    fingerprint cache, so unchanged files are not re-read.
+    """
+    upload_dir = Path(settings.UPLOAD_DIR)
+    if not upload_dir.is_dir():
+        return set()
+    names: Set[str] = set()
+    for path in upload_dir.iterdir():
+        # Skip in-progress uploads (".upload-*.part") and other hidden files
+        if not path.is_file() or path.name.startswith("."):
+            continue
+        try:
+            names.add(insight_services.collection_name_for(path.name, str(path)))
+        except Exception as e:
+            logger.debug("Vector GC could not fingerprint upload | file=%s | error=%s", path.name, e)
+    return names
+
+
+def _pending_collections() -> Set[str]:
+    # Queued/running jobs, plus builds running synchronously in this process
+    # (direct dispatch, batch, initialize_insights)
+    return set(ingestion_jobs.pending_collections()) | set(insight_services.building_collections())
+
+
+def _segment_dirs(collection_name: str) -> List[Path]:
+    """On-disk HNSW segment directories of a collection (empty if unknown)."""
+    try:
+        collection_id = str(vector_store.get_client().get_collection(collection_name).id)
+        db = _store_dir() / "chroma.sqlite3"
+        conn = sqlite3.connect(f"file:{db}?mode=ro", uri=True)
+        try:
+            rows = conn.execute("SELECT id FROM segments WHERE collection=?", (collection_id,)).fetchall()
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.debug("Chroma segment lookup failed | collection=%s | error=%s", collection_name, e)
+        return []
+    return [p for p in (_store_dir() / str(r[0]) for r in rows) if p.is_dir()]
+
+
+def find_orphans() -> Dict[str, Any]:
+    """Classify all collections and size up the orphans, without deleting anything."""
+    collections = vector_store.list_collections()
+    referenced = set(ingestion_db.list_vector_collections())
+    pending = _pending_collections()
+    live = _live_collections()
+    protected = _protected_collections()
+
+    orphans: List[Dict[str, Any]] = []
+    total_vectors = 0
+    for name in sorted(collections):
+        vectors = vector_store.collection_count(name)
+        total_vectors += vectors
+        if name in referenced or name in pending or name in live or name in protected:
+            continue
+        index_bytes = sum(_dir_bytes(p) for p in _segment_dirs(name))
+        orphans.append({"name": name, "vectors": vectors, "index_bytes": index_bytes})
+
+    # Rows in chroma.sqlite3 are shared across collections; attribute them by vector share
+    sqlite_bytes = _dir_bytes(_store_dir() / "chroma.sqlite3")
+    orphan_vectors = sum(o["vectors"] for o in orphans)
+    sqlite_share = int(sqlite_bytes * orphan_vectors / total_vectors) if total_vectors else 0
+    return {
+        "collections_total": len(collections),
+        "referenced": len(referenced & set(collections)),
+        "pending": sorted(pending & set(collections)),
+        "live": sorted((live - referenced) & set(collections)),
+        "protected": sorted(protected & set(collections)),
+        "orphans": orphans,
+        "orphan_vectors": orphan_vectors,
+        "reclaimable_bytes_estimate": sum(o["index_bytes"] for o in orphans) + sqlite_share,
+        "store_bytes": _dir_bytes(_store_dir()),
+    }
+
+
+def compact() -> Dict[str, Any]:
+    """VACUUM ``chroma.sqlite3`` to return freed pages to the filesystem."""
+    db = _store_dir() / "chroma.sqlite3"
+    before = _dir_bytes(db)
+    try:
+        conn = sqlite3.connect(db, timeout=30)
+        try:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+            conn.execute("VACUUM;")
+        finally:
+            conn.close()
+    except sqlite3.OperationalError as e:
+        # Chroma holds the DB busy; the next sweep will retry
+        logger.warning("Chroma compaction skipped | error=%s", e)
+        return {"compacted": False, "error": str(e), "sqlite_bytes": before}
+    after = _dir_bytes(db)
+    return {"compacted": True, "sqlite_bytes_before": before, "sqlite_bytes_after": after}
+
+
+def sweep(*, dry_run: bool = True, compact_store: Optional[bool] = None) -> Dict[str, Any]:
+    """Report (``dry_run``) or delete orphaned collections, then optionally compact.
+
+    Returns the ``find_orphans`` report plus ``deleted``, ``compaction`` and timing.
+    """
+    if not _sweep_lock.acquire(blocking=False):
+        return {"skipped": True, "reason": "sweep already running"}
+    started = time.perf_counter()
+    try:
+        report = find_orphans()
+        report["dry_run"] = dry_run
+        deleted: List[str] = []
+        if not dry_run:
+            # Re-check right before dropping: a job may have been queued or registered meanwhile
+            keep = _pending_collections() | _live_collections()
+            for orphan in report["orphans"]:
+                name = orphan["name"]
+                if name in keep or ingestion_db.count_collection_references(name) > 0:
+                    continue
+                if vector_store.drop_collection(name):
+                    deleted.append(name)
+            do_compact = settings.VECTOR_GC_COMPACT if compact_store is None else compact_store
+            if deleted and do_compact:
+                report["compaction"] = compact()
+            report["store_bytes_after"] = _dir_bytes(_store_dir())
+        report["deleted"] = deleted
+        report["elapsed_ms"] = int((time.perf_counter() - started) * 1000)
+    finally:
+        _sweep_lock.release()
+
+    logger.info(
+        "Vector GC sweep | dry_run=%s | collections=%d | orphans=%d | deleted=%d | reclaimable=%d",
+        dry_run, report["collections_total"], len(report["orphans"]), len(deleted),
+        report["reclaimable_bytes_estimate"],
+    )
+    return report
+
+
+def _schedule_loop(interval: float) -> None:
+    while not _stop.wait(interval):
+        try:
+            sweep(dry_run=False)
+        except Exception as e:
+            logger.error("Vector GC sweep failed | error=%s", e)
+
+
+def start() -> None:
+    """Start the scheduled sweeper (no-op when ``VECTOR_GC_INTERVAL_S`` <= 0)."""
+    global _thread
+    interval = float(settings.VECTOR_GC_INTERVAL_S)
+    if _thread is not None or interval <= 0:
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_schedule_loop, args=(interval,), name="vector-gc", daemon=True)
+    _thread.start()
+    logger.info("Vector GC scheduled | interval_s=%s", interval)
+
+
+def stop() -> None:
+    global _thread
+    if _thread is None:
+        return
+    _stop.set()
+    _thread.join(timeout=5)
+    _thread = None
+
+
+__all__ = ["compact", "find_orphans", "start", "stop", "sweep"]
@@ -0,0 +1,200 @@
+"""Process-level Chroma manager: one persistent client, cached collection handles.
+
+Opening ``langchain_chroma.Chroma`` per call re-opens the persistent directory
+and re-resolves the collection. Services obtain handles from here instead; a
+handle is invalidated whenever its collection is dropped (e.g. ``force`` rebuilds).
+"""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import chromadb
+from langchain_chroma import Chroma
+
+from app.core.config import settings
+from app.services.generic import embeddings
+from app.utils.Logging.logger import logger
+
+
+_client: Optional["chromadb.ClientAPI"] = None
+_stores: Dict[str, Chroma] = {}
+# Per-collection write counter; derived caches (answers) compare it to detect staleness
+_generations: Dict[str, int] = {}
+_lock = threading.RLock()
+
+
+def get_client() -> "chromadb.ClientAPI":
+    """Return the shared persistent Chroma client for ``settings.VECTOR_STORE_DIR``."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                persist_dir = Path(settings.VECTOR_STORE_DIR)
+                _client = chromadb.PersistentClient(path=str(persist_dir))
+                logger.info("Chroma client opened | dir=%s", persist_dir)
+    return _client
+
+
+def get_store(collection_name: str) -> Chroma:
+    """Return a cached LangChain handle for the collection, creating it if missing.
+
+    The handle embeds through the chunk-embedding cache, so it serves both
+    ingestion (``add_documents``) and retrieval.
+    """
+    vs = _stores.get(collection_name)
+    if vs is not None:
+        return vs
+    with _lock:
+        vs = _stores.get(collection_name)
+        if vs is None:
+            vs = Chroma(
+                collection_name=collection_name,
+                client=get_client(),
+                embedding_function=embeddings.get_ingest_embeddings(),
+            )
+            _stores[collection_name] = vs
+            logger.info("Chroma collection handle cached | collection=%s", collection_name)
+    return vs
+
+
+def generation(collection_name: str) -> int:
+    return _generations.get(collection_name, 0)
+
+
+def mark_changed(collection_name: str) -> None:
+    """Record a write to the collection (call after ``add_documents`` on a handle)."""
+    with _lock:
+        _generations[collection_name] = _generations.get(collection_name, 0) + 1
+
+
+def add_embedded(
+    collection_name: str,
+    *,
+    ids: List[str],
+    texts: List[str],
+    metadatas: List[Dict[str, Any]],
+    vectors: List[List[float]],
+) -> None:
+    """Write chunks whose vectors were computed elsewhere (no embedding call here)."""
+    if not ids:
+        return
+    collection = get_store(collection_name)._collection  # type: ignore[attr-defined]
+    # Chroma rejects empty metadata dicts, so write those rows without metadata
+    with_meta = [i for i, m in enumerate(metadatas) if m]
+    without_meta = [i for i, m in enumerate(metadatas) if not m]
+    if with_meta:
+        collection.upsert(
+            ids=[ids[i] for i in with_meta],
+            embeddings=[vectors[i] for i in with_meta],
+            documents=[texts[i] for i in with_meta],
+            metadatas=[metadatas[i] for i in with_meta],
+        )
+    if without_meta:
+        collection.upsert(
+            ids=[ids[i] for i in without_meta],
+            embeddings=[vectors[i] for i in without_meta],
+            documents=[texts[i] for i in without_meta],
+        )
+    # Bump after the write: a reader that sees the new generation also sees the new rows
+    mark_changed(collection_name)
+
+
+def existing_ids(collection_name: str, ids: List[str]) -> List[str]:
+    """Those of ``ids`` already stored in the collection; one lookup per call, no vectors fetched."""
+    if not ids:
+        return []
+    try:
+        collection = get_client().get_collection(collection_name)
+    except Exception:
+        return []
+    return list(collection.get(ids=ids, include=[]).get("ids") or [])
+
+
+def copy_chunks(
+    source: str,
+    target: str,
+    *,
+    ids: List[str],
+    metadatas: List[Dict[str, Any]],
+) -> int:
+    """Copy records (text + stored vector) between collections with refreshed metadata.
+
+    Used by incremental re-indexing so unchanged chunks are never re-embedded.
+    Returns the number of records copied.
+    """
+    src = get_store(source)._collection  # type: ignore[attr-defined]
+    meta_by_id = dict(zip(ids, metadatas))
+    copied = 0
+    for start in range(0, len(ids), 500):
+        part = ids[start : start + 500]
+        data = src.get(ids=part, include=["documents", "embeddings"])
+        got = list(data.get("ids") or [])
+        if not got:
+            continue
+        add_embedded(
+            target,
+            ids=got,
+            texts=list(data.get("documents") or []),
+            metadatas=[meta_by_id.get(i) or {} for i in got],
+            vectors=[[float(x) for x in v] for v in data.get("embeddings")],
+        )
+        copied += len(got)
+    if copied < len(ids):
+        logger.warning(
+            "Chunk copy incomplete | source=%s | target=%s | expected=%d | copied=%d",
+            source, target, len(ids), copied,
+        )
+    return copied
+
+
+def list_collections() -> List[str]:
+    # chromadb < 0.6 returns Collection objects, newer versions return names
+    return [getattr(c, "name", c) for c in get_client().list_collections()]
+
+
+def collection_count(collection_name: str) -> int:
+    """Vector count for an existing collection; 0 if it does not exist (never creates it)."""
+    vs = _stores.get(collection_name)
+    try:
+        if vs is not None:
+            return int(vs._collection.count())  # type: ignore[attr-defined]
+        return int(get_client().get_collection(collection_name).count())
+    except Exception:
+        return 0
+
+
+def invalidate(collection_name: str) -> None:
+    with _lock:
+        _stores.pop(collection_name, None)
+
+
+def drop_collection(collection_name: str) -> bool:
+    """Delete the collection and its cached handle. Returns False if it did not exist."""
+    with _lock:
+        _stores.pop(collection_name, None)
+        _generations[collection_name] = _generations.get(collection_name, 0) + 1
+        try:
+            get_client().delete_collection(collection_name)
+        except Exception as e:
+            logger.debug("Chroma collection drop skipped | collection=%s | error=%s", collection_name, e)
+            return False
+    logger.info("Chroma collection dropped | collection=%s", collection_name)
+    return True
+
+
+__all__ = [
+    "add_embedded",
+    "collection_count",
+    "copy_chunks",
+    "drop_collection",
+    "existing_ids",
+    "generation",
+    "get_client",
+    "get_store",
+    "invalidate",
+    "list_collections",
+    "mark_changed",
+]
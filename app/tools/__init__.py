@@ -7,7 +7,7 @@ from .generic import (
     check_file_ready,
     list_agent_files,
 )
-from .agent.dochelp_tools import chat_over_file, list_indexed_docs_db
+from .agent.dochelp_tools import chat_over_file, describe_csv, list_indexed_docs_db, query_csv
 from .agent.recruiter_tools import (
     translate_job_description,
     search_recruiter_candidates,
@@ -19,6 +19,8 @@ from .agent.recruiter_tools import (
 # To add a new tool, export it from a module and append it here.
 ALL_TOOLS = [
     chat_over_file,
+    describe_csv,
+    query_csv,
     initialize_insights,
     list_agent_files,
     check_file_ready,
@@ -1,29 +1,69 @@
 from __future__ import annotations
 
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool, tool
 from typing import List, Dict, Any
 
-from app.services.generic import chat_service
+from app.services.generic import chat_service, csv_tables
 from app.services.agents import dochelp_service
+from app.tools.streaming import emit_token
 
 
-@tool("chat_over_file")
-def chat_over_file(file: str, query: str) -> str:
-    """
-    Answer a natural language question grounded in the given uploaded file.
-    """
-    result = chat_service.answer(
-        file,
-        query,
-        k=24,
-        score_threshold=0.0,
-        strict=False,
-    )
+def _response_text(result: Any) -> str:
     if isinstance(result, dict) and "response" in result:
         return str(result["response"])  # type: ignore[index]
     return str(result)
 
 
+def _chat_over_file(file: str, query: str) -> str:
+    """
+    Answer a natural language question grounded in the given uploaded file.
+    """
+    return _response_text(chat_service.answer(file, query, k=24, score_threshold=0.0, strict=False))
+
+
+async def _achat_over_file(file: str, query: str) -> str:
+    parts: List[str] = []
+    async for token in chat_service.answer_stream(file, query, k=24, score_threshold=0.0, strict=False):
+        parts.append(token)
+        await emit_token("chat_over_file", token)
+    return "".join(parts)
+
+
+# Sync + async implementations: AgentExecutor.ainvoke awaits the coroutine instead of using a thread
+chat_over_file = StructuredTool.from_function(
+    func=_chat_over_file,
+    coroutine=_achat_over_file,
+    name="chat_over_file",
+)
+
+
+@tool("describe_csv")
+def describe_csv(file: str) -> str:
+    """
+    Show the SQL schema of an uploaded CSV file: the view name (always `data`),
+    columns with types and original headers, row count and a few sample rows.
+    Call this before query_csv to learn the column names.
+    """
+    try:
+        return str(csv_tables.describe(file))
+    except Exception as e:
+        return str({"file": file, "error": str(e)})
+
+
+@tool("query_csv")
+def query_csv(file: str, sql: str) -> str:
+    """
+    Run a read-only SQLite SELECT over an uploaded CSV file, exposed as the view `data`.
+    Use for exact filtering, counting, sums, averages, grouping and comparisons, e.g.
+    SELECT category, AVG(price) FROM data GROUP BY category ORDER BY 2 DESC.
+    Returns { columns, rows, row_count, truncated }.
+    """
+    try:
+        return str(csv_tables.query(file, sql))
+    except Exception as e:
+        return str({"file": file, "error": str(e)})
+
+
 @tool("list_indexed_docs_db")
 def list_indexed_docs_db(agent: str = "DocHelp") -> str:
     """
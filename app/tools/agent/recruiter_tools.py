@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 import json
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool, tool
 
 from app.services.agents import recruiter_service
 from app.services.generic import chat_service
+from app.tools.streaming import emit_token
 
 
 @tool("translate_job_description")
@@ -18,16 +19,22 @@ def translate_job_description(description: str) -> str:
 @tool("search_recruiter_candidates")
 def search_recruiter_candidates(description: str, max_results: int = 5) -> str:
     """Return the strongest candidate matches for the provided description."""
-    matches = recruiter_service.search_candidates(description, max_results=max_results)
+    result = recruiter_service.search_candidates_detailed(description, max_results=max_results)
     payload = {
-        "matches": [match.as_dict() for match in matches],
-        "count": len(matches),
+        "matches": [match.as_dict() for match in result.matches],
+        "count": len(result.matches),
+        **result.diagnostics(),
     }
     return json.dumps(payload)
 
 
-@tool("chat_over_profile")
-def chat_over_profile(
+def _response_text(result) -> str:
+    if isinstance(result, dict) and "response" in result:
+        return str(result["response"])
+    return str(result)
+
+
+def _chat_over_profile(
     file: str,
     query: str,
     k: int = 24,
@@ -42,9 +49,34 @@ def chat_over_profile(
         score_threshold=score_threshold,
         strict=strict,
     )
-    if isinstance(result, dict) and "response" in result:
-        return str(result["response"])
-    return str(result)
+    return _response_text(result)
+
+
+async def _achat_over_profile(
+    file: str,
+    query: str,
+    k: int = 24,
+    score_threshold: float = 0.45,
+    strict: bool = False,
+) -> str:
+    parts = []
+    async for token in chat_service.answer_stream(
+        file,
+        query,
+        k=k,
+        score_threshold=score_threshold,
+        strict=strict,
+    ):
+        parts.append(token)
+        await emit_token("chat_over_profile", token)
+    return "".join(parts)
+
+
+chat_over_profile = StructuredTool.from_function(
+    func=_chat_over_profile,
+    coroutine=_achat_over_profile,
+    name="chat_over_profile",
+)
 
 
 __all__ = [
@@ -0,0 +1,21 @@
+"""Token streaming from inside tools.
+
+Async tools that produce an answer with their own LLM call forward each token as
+a LangChain custom event, so ``astream_events`` consumers (the SSE endpoints)
+can relay it before the tool returns.
+"""
+
+from __future__ import annotations
+
+from langchain_core.callbacks import adispatch_custom_event
+
+
+TOKEN_EVENT = "answer_token"
+
+
+async def emit_token(tool: str, token: str) -> None:
+    try:
+        await adispatch_custom_event(TOKEN_EVENT, {"tool": tool, "token": token})
+    except RuntimeError:
+        # Not running under a traced agent run (e.g. direct call); nothing to forward to
+        pass
@@ -0,0 +1,73 @@
+"""Parallel page-level PDF text extraction.
+
+Kept free of LangChain/app imports so spawned worker processes start quickly.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from pypdf import PdfReader
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_lock = threading.Lock()
+
+
+def page_count(path: str) -> int:
+    return len(PdfReader(path).pages)
+
+
+def _extract_range(path: str, start: int, end: int) -> List[Tuple[int, str, Optional[str]]]:
+    """Extract text of pages [start, end) as (page index, text, page label)."""
+    reader = PdfReader(path)
+    try:
+        labels = reader.page_labels
+    except Exception:
+        labels = []
+    out: List[Tuple[int, str, Optional[str]]] = []
+    for idx in range(start, end):
+        text = reader.pages[idx].extract_text() or ""
+        out.append((idx, text, labels[idx] if idx < len(labels) else None))
+    return out
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def extract_pages(
+    path: str,
+    *,
+    workers: int,
+    total: Optional[int] = None,
+    min_pages_per_task: int = 16,
+) -> List[Tuple[int, str, Optional[str]]]:
+    """Extract all pages across a process pool and return them in page order."""
+    total = page_count(path) if total is None else total
+    if total == 0:
+        return []
+    # A few ranges per worker keeps the pool busy when page complexity varies
+    size = max(min_pages_per_task, -(-total // (workers * 4)))
+    ranges = [(start, min(start + size, total)) for start in range(0, total, size)]
+    pool = _get_pool(workers)
+    futures = [pool.submit(_extract_range, path, start, end) for start, end in ranges]
+    pages: List[Tuple[int, str, Optional[str]]] = []
+    # Futures are consumed in submission order, so pages come back already ordered
+    for future in futures:
+        pages.extend(future.result())
+    return pages
+
+
+__all__ = ["extract_pages", "page_count"]
@@ -0,0 +1,77 @@
+"""Model-free language identification.
+
+Non-Latin scripts are identified from their Unicode blocks; Latin-script text is
+scored against small stopword lists. Good enough to decide whether a job
+description needs translating, without loading a model.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from typing import Dict, FrozenSet, Tuple
+
+
+UNKNOWN = "und"
+
+# (first code point, last code point, language or script tag)
+_SCRIPTS: Tuple[Tuple[int, int, str], ...] = (
+    (0x0370, 0x03FF, "el"),
+    (0x0400, 0x04FF, "ru"),
+    (0x0590, 0x05FF, "he"),
+    (0x0600, 0x06FF, "ar"),
+    (0x0900, 0x097F, "hi"),
+    (0x0E00, 0x0E7F, "th"),
+    (0x3040, 0x30FF, "ja"),
+    (0x4E00, 0x9FFF, "zh"),
+    (0xAC00, 0xD7AF, "ko"),
+)
+
+_STOPWORDS: Dict[str, FrozenSet[str]] = {
+    "en": frozenset(
+        "the and of to in for with on is are be as we you our your will this that an or at by from have experience".split()
+    ),
+    "es": frozenset("el la los las de del y en con para por que una un es se su sus al como experiencia".split()),
+    "fr": frozenset("le la les des du de et en avec pour une un est que sur dans au aux vous nous expérience".split()),
+    "de": frozenset("der die das und mit für von den dem ein eine ist sie wir auf im zu nicht erfahrung".split()),
+    "pt": frozenset("o a os as de do da dos das e em com para por que um uma é não experiência".split()),
+    "it": frozenset("il lo la gli le di del della e con per che un una è sono nel alla esperienza".split()),
+    "nl": frozenset("de het een en van met voor op is zijn wij je ons niet ervaring".split()),
+}
+
+_WORD = re.compile(r"[^\W\d_]+", re.UNICODE)
+# Share of letters in one non-Latin block that decides the script
+_SCRIPT_SHARE = 0.3
+
+
+def _script_of(ch: str) -> str:
+    cp = ord(ch)
+    for lo, hi, tag in _SCRIPTS:
+        if lo <= cp <= hi:
+            return tag
+    return "latin"
+
+
+def detect_language(text: str) -> Tuple[str, float]:
+    """Return ``(language code, confidence)``; ``"und"`` when there is too little signal."""
+    letters = [ch for ch in text or "" if ch.isalpha()]
+    if not letters:
+        return UNKNOWN, 0.0
+    scripts = Counter(_script_of(ch) for ch in letters)
+    script, count = max(((s, c) for s, c in scripts.items() if s != "latin"), key=lambda x: x[1], default=("", 0))
+    if script and count / len(letters) >= _SCRIPT_SHARE:
+        # Kanji-only text is read as Chinese unless kana are present
+        if script == "zh" and scripts.get("ja"):
+            script = "ja"
+        return script, round(count / len(letters), 3)
+
+    words = [w.lower() for w in _WORD.findall(text)]
+    hits = {lang: sum(1 for w in words if w in stop) for lang, stop in _STOPWORDS.items()}
+    total = sum(hits.values())
+    if not total:
+        return UNKNOWN, 0.0
+    lang = max(hits, key=lambda k: (hits[k], k == "en"))
+    return lang, round(hits[lang] / total, 3)
+
+
+__all__ = ["UNKNOWN", "detect_language"]
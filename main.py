@@ -1,11 +1,30 @@
 # main.py
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.router import router  # your combined router
+from app.services.generic import embeddings, http_clients, ingestion_jobs, session_store, vector_gc
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load shared embedding backend once, before serving traffic
+    embeddings.warmup()
+    ingestion_jobs.start()
+    vector_gc.start()
+    try:
+        yield
+    finally:
+        vector_gc.stop()
+        ingestion_jobs.stop()
+        session_store.flush()
+        await http_clients.aclose()
+
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="AI Assistant", version="1.0.0")
+    app = FastAPI(title="AI Assistant", version="1.0.0", lifespan=lifespan)
 
     # CORS must be added to the SAME app instance that serves requests
     DEV_ORIGINS = [
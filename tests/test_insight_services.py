@@ -0,0 +1,103 @@
+import csv
+
+import pytest
+
+pytest.importorskip("langchain_core")
+pytest.importorskip("langchain_chroma")
+
+from langchain_core.documents import Document
+
+from app.services.generic import insight_services
+
+
+def _write_csv(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["name", "role"])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _diff(file_location, previous_ids=None, batch_size=256):
+    lookups = []
+
+    def present(ids):
+        lookups.append(list(ids))
+        return [i for i in ids if i in previous_ids]
+
+    kept, added = [], []
+    for k, a in insight_services.iter_chunk_diff(
+        file_location, present if previous_ids is not None else None, batch_size=batch_size
+    ):
+        kept += [i for i, _ in k]
+        added += [i for i, _ in a]
+    return kept, added, lookups
+
+
+def test_duplicate_chunks_get_occurrence_indexes():
+    chunks = [Document(page_content="alpha"), Document(page_content="beta"), Document(page_content="alpha")]
+    ids = insight_services.assign_chunk_ids(chunks)
+
+    assert ids[0].endswith("-0") and ids[2].endswith("-1")
+    assert ids[0][:-2] == ids[2][:-2]
+    assert ids[1].endswith("-0")
+    assert len(set(ids)) == 3
+    assert chunks[0].metadata["chunk_hash"] == chunks[2].metadata["chunk_hash"]
+
+
+def test_csv_duplicates_are_numbered_per_row_without_shared_state():
+    rows = [Document(page_content="same", metadata={"row": r}) for r in range(3)]
+    copies = [Document(page_content=d.page_content, metadata=dict(d.metadata)) for d in rows]
+    together = insight_services.assign_chunk_ids(copies)
+    # Windows are id'd independently; ids must not depend on what earlier windows saw
+    windowed = insight_services.assign_chunk_ids(rows[:1]) + insight_services.assign_chunk_ids(rows[1:])
+
+    assert together == windowed
+    assert len(set(together)) == 3
+    assert [i.split("-", 1)[1] for i in together] == ["r0-0", "r1-0", "r2-0"]
+
+
+def test_incremental_diff_counts(tmp_path):
+    path = tmp_path / "people.csv"
+    _write_csv(path, [
+        {"name": "Ada", "role": "engineer"},
+        {"name": "Grace", "role": "admiral"},
+        {"name": "Alan", "role": "mathematician"},
+    ])
+    _, first, _ = _diff(str(path))
+    assert len(first) == 3
+
+    _write_csv(path, [
+        {"name": "Ada", "role": "engineer"},
+        {"name": "Grace", "role": "rear admiral"},
+        {"name": "Alan", "role": "mathematician"},
+        {"name": "Edsger", "role": "computer scientist"},
+    ])
+    kept, added, _ = _diff(str(path), previous_ids=set(first))
+
+    assert len(kept) == 2
+    assert len(added) == 2
+    assert insight_services.diff_counts(len(first), len(kept), len(added)) == {"kept": 2, "added": 2, "removed": 1}
+
+
+def test_incremental_diff_asks_one_batch_at_a_time(tmp_path):
+    path = tmp_path / "people.csv"
+    _write_csv(path, [{"name": f"person {i}", "role": "engineer"} for i in range(5)])
+    _, first, _ = _diff(str(path))
+
+    kept, added, lookups = _diff(str(path), previous_ids=set(first), batch_size=2)
+
+    assert kept == first and added == []
+    assert all(len(batch) <= 2 for batch in lookups)
+    assert sum(len(batch) for batch in lookups) == len(first)
+
+
+def test_unchanged_file_keeps_everything(tmp_path, monkeypatch):
+    monkeypatch.setattr(insight_services.settings, "EXTRACTED_TEXT_CACHE_ENABLED", False)
+    path = tmp_path / "notes.txt"
+    path.write_text("Line one of the notes.\n\nLine two of the notes.\n", encoding="utf-8")
+    _, first, _ = _diff(str(path))
+
+    kept, added, _ = _diff(str(path), previous_ids=set(first))
+
+    assert kept == first and added == []
+    assert insight_services.diff_counts(len(first), len(kept), len(added))["removed"] == 0
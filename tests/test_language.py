@@ -0,0 +1,57 @@
+import pytest
+
+from app.utils.text.language import UNKNOWN, detect_language
+
+
+@pytest.mark.parametrize("text", ["", "   ", "12345 !!"])
+def test_no_letters_is_unknown(text):
+    assert detect_language(text) == (UNKNOWN, 0.0)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("We are looking for a Python developer with experience in Django and the cloud.", "en"),
+        ("Buscamos un desarrollador Python con experiencia en Django para el equipo de datos.", "es"),
+        ("Nous recherchons un développeur Python avec une expérience de Django pour notre équipe.", "fr"),
+        ("Wir suchen einen Python-Entwickler mit Erfahrung in Django für das Team.", "de"),
+    ],
+)
+def test_latin_languages_by_stopwords(text, expected):
+    lang, confidence = detect_language(text)
+    assert lang == expected
+    assert 0.0 < confidence <= 1.0
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Разработчик Python с опытом работы", "ru"),
+        ("Pythonエンジニアを募集しています", "ja"),
+        ("Python开发工程师，需要三年经验", "zh"),
+        ("مطور بايثون ذو خبرة", "ar"),
+    ],
+)
+def test_non_latin_scripts(text, expected):
+    assert detect_language(text)[0] == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Programista Python z doświadczeniem",
+        "Lập trình viên Python có kinh nghiệm",
+        "Python, Django, PostgreSQL, Docker",
+    ],
+)
+def test_languages_without_evidence_are_unknown(text):
+    # No stopword list matches, so callers must not assume English
+    assert detect_language(text) == (UNKNOWN, 0.0)
+
+
+def test_latin_script_words_in_non_latin_text():
+    assert detect_language("Разработчик Python и Django с опытом работы в команде")[0] == "ru"
+
+
+def test_short_english_with_stopwords():
+    assert detect_language("Senior Python developer with Django experience")[0] == "en"